@@ -1,22 +1,47 @@
 """The AV Scenes integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+from functools import partial
+from typing import Any, Awaitable, Callable
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import (
+    HomeAssistant,
+    callback,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.start import async_at_started
 
 from .const import (
     DOMAIN,
     SERVICE_START_ACTIVITY,
     SERVICE_STOP_ACTIVITY,
     SERVICE_RELOAD,
+    SERVICE_START_ACTIVITIES,
+    SERVICE_STOP_ALL,
+    SERVICE_WAIT_FOR_JOB,
+    SERVICE_RECONCILE,
     ATTR_ROOM,
     ATTR_ACTIVITY,
+    ATTR_ACTIVITIES,
+    ATTR_ROOMS,
+    ATTR_MAX_CONCURRENT,
+    ATTR_WAIT,
+    ATTR_JOB_ID,
+    ATTR_TIMEOUT,
 )
-from .coordinator import AVScenesCoordinator
+from .coordinator import AVScenesCoordinator, state_store
+from .jobs import async_get_job_tracker
+from .registry import async_get_registry
+from .report import RUN_STATUS_FAILED, RunReport
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,43 +49,259 @@ PLATFORMS: list[Platform] = [Platform.SCENE, Platform.SWITCH, Platform.SENSOR, P
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
+START_ACTIVITY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ROOM): cv.string,
+        vol.Required(ATTR_ACTIVITY): cv.string,
+        vol.Optional(ATTR_WAIT, default=True): cv.boolean,
+    }
+)
+
+STOP_ACTIVITY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ROOM): cv.string,
+        vol.Optional(ATTR_WAIT, default=True): cv.boolean,
+    }
+)
+
+RECONCILE_SCHEMA = vol.Schema({vol.Optional(ATTR_ROOM): cv.string})
 
-def _get_coordinator_for_room(hass: HomeAssistant, room_id: str) -> AVScenesCoordinator | None:
-    """Find the coordinator that manages the given room."""
-    for coordinator in hass.data.get(DOMAIN, {}).values():
-        if isinstance(coordinator, AVScenesCoordinator) and room_id in coordinator.rooms:
-            return coordinator
-    return None
+START_ACTIVITIES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ACTIVITIES): {cv.string: cv.string},
+        vol.Optional(ATTR_MAX_CONCURRENT): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_WAIT, default=True): cv.boolean,
+    }
+)
+
+STOP_ALL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ROOMS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_MAX_CONCURRENT): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_WAIT, default=True): cv.boolean,
+    }
+)
+
+WAIT_FOR_JOB_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_JOB_ID): cv.string,
+        vol.Optional(ATTR_TIMEOUT): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+
+def _get_coordinator_for_room(
+    hass: HomeAssistant, room: str
+) -> tuple[AVScenesCoordinator, str] | tuple[None, None]:
+    """Find the coordinator that manages the given room (id or name)."""
+    return async_get_registry(hass).async_resolve(room) or (None, None)
+
+
+async def _async_run_rooms(
+    jobs: dict[str, Callable[[], Awaitable[RunReport]]],
+    max_concurrent: int | None,
+    not_found: list[str],
+) -> dict[str, Any]:
+    """Run one job per room concurrently, at most ``max_concurrent`` at a time.
+
+    Returns the reports of all rooms once every room has finished; a failing
+    room is logged and does not abort the others.  Rooms in ``not_found``
+    are reported as failed.
+    """
+    semaphore = asyncio.Semaphore(max_concurrent or len(jobs) or 1)
+
+    async def run(job: Callable[[], Awaitable[RunReport]]) -> RunReport:
+        async with semaphore:
+            return await job()
+
+    results = await asyncio.gather(
+        *(run(job) for job in jobs.values()), return_exceptions=True
+    )
+    reports: dict[str, Any] = {
+        room: {"room": room, "status": RUN_STATUS_FAILED, "error": "Room not found"}
+        for room in not_found
+    }
+    for room, result in zip(jobs, results):
+        if isinstance(result, Exception):
+            _LOGGER.error("Room '%s' failed: %s", room, result, exc_info=result)
+            reports[room] = {
+                "room": room,
+                "status": RUN_STATUS_FAILED,
+                "error": str(result),
+            }
+        else:
+            reports[room] = result.as_dict()
+    return {"rooms": reports}
+
+
+def _room_not_found(call: ServiceCall, room: str) -> ServiceResponse:
+    """Return the response of a call addressing an unknown room."""
+    if not call.return_response:
+        return None
+    return {"room": room, "status": RUN_STATUS_FAILED, "error": "Room not found"}
+
+
+async def _async_respond(
+    hass: HomeAssistant,
+    call: ServiceCall,
+    job: Callable[[], Awaitable[dict[str, Any]]],
+) -> ServiceResponse:
+    """Run a service job, or schedule it in the background for ``wait: false``.
+
+    A background job answers with its job id right away; its result is
+    available through ``wait_for_job`` and the ``av_scenes_job_finished`` event.
+    """
+    if not call.data.get(ATTR_WAIT, True):
+        job_id = async_get_job_tracker(hass).async_submit(job)
+        return {ATTR_JOB_ID: job_id} if call.return_response else None
+    response = await job()
+    return response if call.return_response else None
 
 
 def _register_services(hass: HomeAssistant) -> None:
     """Register domain-level services (called once when first entry is set up)."""
 
-    async def handle_start_activity(call: ServiceCall) -> None:
-        room_id = call.data.get(ATTR_ROOM)
-        activity_name = call.data.get(ATTR_ACTIVITY)
-        coordinator = _get_coordinator_for_room(hass, room_id)
+    async def handle_start_activity(call: ServiceCall) -> ServiceResponse:
+        room = call.data[ATTR_ROOM]
+        activity_name = call.data[ATTR_ACTIVITY]
+        coordinator, room_id = _get_coordinator_for_room(hass, room)
         if coordinator is None:
-            _LOGGER.error("No coordinator found for room '%s'", room_id)
-            return
-        await coordinator.async_start_activity(room_id, activity_name)
+            _LOGGER.error("No coordinator found for room '%s'", room)
+            return _room_not_found(call, room)
+
+        async def run() -> dict[str, Any]:
+            report = await coordinator.async_start_activity(room_id, activity_name)
+            return report.as_dict()
+
+        return await _async_respond(hass, call, run)
 
-    async def handle_stop_activity(call: ServiceCall) -> None:
-        room_id = call.data.get(ATTR_ROOM)
-        coordinator = _get_coordinator_for_room(hass, room_id)
+    async def handle_stop_activity(call: ServiceCall) -> ServiceResponse:
+        room = call.data[ATTR_ROOM]
+        coordinator, room_id = _get_coordinator_for_room(hass, room)
         if coordinator is None:
-            _LOGGER.error("No coordinator found for room '%s'", room_id)
-            return
-        await coordinator.async_stop_activity(room_id)
+            _LOGGER.error("No coordinator found for room '%s'", room)
+            return _room_not_found(call, room)
+
+        async def run() -> dict[str, Any]:
+            report = await coordinator.async_stop_activity(room_id)
+            return report.as_dict()
+
+        return await _async_respond(hass, call, run)
+
+    async def handle_start_activities(call: ServiceCall) -> ServiceResponse:
+        jobs: dict[str, Callable[[], Awaitable[RunReport]]] = {}
+        not_found: list[str] = []
+        for room, activity_name in call.data[ATTR_ACTIVITIES].items():
+            coordinator, room_id = _get_coordinator_for_room(hass, room)
+            if coordinator is None:
+                _LOGGER.error("No coordinator found for room '%s'", room)
+                not_found.append(room)
+                continue
+            jobs[room_id] = partial(
+                coordinator.async_start_activity, room_id, activity_name
+            )
+        return await _async_respond(
+            hass,
+            call,
+            partial(
+                _async_run_rooms,
+                jobs,
+                call.data.get(ATTR_MAX_CONCURRENT),
+                not_found,
+            ),
+        )
+
+    async def handle_stop_all(call: ServiceCall) -> ServiceResponse:
+        registry = async_get_registry(hass)
+        jobs: dict[str, Callable[[], Awaitable[RunReport]]] = {}
+        not_found: list[str] = []
+        for room in call.data.get(ATTR_ROOMS) or registry.room_ids:
+            coordinator, room_id = _get_coordinator_for_room(hass, room)
+            if coordinator is None:
+                _LOGGER.error("No coordinator found for room '%s'", room)
+                not_found.append(room)
+                continue
+            jobs[room_id] = partial(coordinator.async_stop_activity, room_id)
+        return await _async_respond(
+            hass,
+            call,
+            partial(
+                _async_run_rooms,
+                jobs,
+                call.data.get(ATTR_MAX_CONCURRENT),
+                not_found,
+            ),
+        )
+
+    async def handle_wait_for_job(call: ServiceCall) -> ServiceResponse:
+        result = await async_get_job_tracker(hass).async_wait(
+            call.data[ATTR_JOB_ID], call.data.get(ATTR_TIMEOUT)
+        )
+        return result if call.return_response else None
+
+    async def handle_reconcile(call: ServiceCall) -> ServiceResponse:
+        rooms: dict[str, Any] = {}
+        room = call.data.get(ATTR_ROOM)
+        if room:
+            coordinator, room_id = _get_coordinator_for_room(hass, room)
+            if coordinator is None:
+                _LOGGER.error("No coordinator found for room '%s'", room)
+                return _room_not_found(call, room)
+            rooms.update(coordinator.async_reconcile(room_id))
+        else:
+            for coordinator in list(hass.data.get(DOMAIN, {}).values()):
+                if isinstance(coordinator, AVScenesCoordinator):
+                    rooms.update(coordinator.async_reconcile())
+        return {"rooms": rooms} if call.return_response else None
 
     async def handle_reload(call: ServiceCall) -> None:
         for entry_id, coordinator in list(hass.data.get(DOMAIN, {}).items()):
             if isinstance(coordinator, AVScenesCoordinator):
                 await hass.config_entries.async_reload(entry_id)
 
-    hass.services.async_register(DOMAIN, SERVICE_START_ACTIVITY, handle_start_activity)
-    hass.services.async_register(DOMAIN, SERVICE_STOP_ACTIVITY, handle_stop_activity)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_ACTIVITY,
+        handle_start_activity,
+        schema=START_ACTIVITY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_ACTIVITY,
+        handle_stop_activity,
+        schema=STOP_ACTIVITY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     hass.services.async_register(DOMAIN, SERVICE_RELOAD, handle_reload)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_ACTIVITIES,
+        handle_start_activities,
+        schema=START_ACTIVITIES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_ALL,
+        handle_stop_all,
+        schema=STOP_ALL_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_WAIT_FOR_JOB,
+        handle_wait_for_job,
+        schema=WAIT_FOR_JOB_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECONCILE,
+        handle_reconcile,
+        schema=RECONCILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     _LOGGER.debug("Domain services registered")
 
 
@@ -69,6 +310,11 @@ def _unregister_services(hass: HomeAssistant) -> None:
     hass.services.async_remove(DOMAIN, SERVICE_START_ACTIVITY)
     hass.services.async_remove(DOMAIN, SERVICE_STOP_ACTIVITY)
     hass.services.async_remove(DOMAIN, SERVICE_RELOAD)
+    hass.services.async_remove(DOMAIN, SERVICE_START_ACTIVITIES)
+    hass.services.async_remove(DOMAIN, SERVICE_STOP_ALL)
+    hass.services.async_remove(DOMAIN, SERVICE_WAIT_FOR_JOB)
+    hass.services.async_remove(DOMAIN, SERVICE_RECONCILE)
+    async_get_job_tracker(hass).async_cancel_all()
     _LOGGER.debug("Domain services unregistered")
 
 
@@ -82,6 +328,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
     await coordinator.async_refresh()
+    async_get_registry(hass).async_register(coordinator)
+
+    # Devices may have been switched while HA was down (or by their own
+    # remote); match the rooms against the live states once they are loaded
+    @callback
+    def _async_reconcile_rooms(_: HomeAssistant) -> None:
+        coordinator.async_reconcile()
+
+    entry.async_on_unload(async_at_started(hass, _async_reconcile_rooms))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -107,7 +362,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        async_get_registry(hass).async_unregister(coordinator)
 
         # Unregister services when the last entry is removed
         remaining = [v for v in hass.data[DOMAIN].values() if isinstance(v, AVScenesCoordinator)]
@@ -117,6 +373,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted room state of a deleted entry."""
+    await state_store(hass, entry.entry_id).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await hass.config_entries.async_reload(entry.entry_id)
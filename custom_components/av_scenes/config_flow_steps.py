@@ -16,6 +16,21 @@ from .const import (
     CONF_STEP_TYPE,
     CONF_STEP_DELAY_AFTER,
     CONF_STEP_PARAMETERS,
+    CONF_STEP_GROUP,
+    CONF_STEP_DEPENDS_ON,
+    CONF_STEP_WAIT_STATE,
+    CONF_STEP_WAIT_ATTRIBUTE,
+    CONF_EXECUTION_MODE,
+    CONF_SHUTDOWN_ORDER,
+    CONF_SHUTDOWN_DELAY,
+    CONF_BLOCKING,
+    CONF_CALL_TIMEOUT,
+    CONF_STEP_RETRIES,
+    CONF_ADAPTIVE_DELAYS,
+    CONF_ENFORCE,
+    DEFAULT_CALL_TIMEOUT,
+    EXECUTION_MODE_SEQUENTIAL,
+    EXECUTION_MODE_PER_ENTITY,
     CONF_ENTITY_ID,
     CONF_INPUT_SOURCE,
     CONF_VOLUME_LEVEL,
@@ -45,6 +60,111 @@ _LOGGER = logging.getLogger(__name__)
 class StepsFlowMixin:
     """Mixin for step management flow steps."""
 
+    @staticmethod
+    def _step_group_schema(step: dict[str, Any]) -> dict[Any, Any]:
+        """Return the optional group/depends_on fields shared by all step forms."""
+        return {
+            vol.Optional(
+                CONF_STEP_GROUP,
+                description={"suggested_value": step.get(CONF_STEP_GROUP, "")},
+            ): str,
+            vol.Optional(
+                CONF_STEP_DEPENDS_ON,
+                description={
+                    "suggested_value": ", ".join(step.get(CONF_STEP_DEPENDS_ON, []))
+                },
+            ): str,
+        }
+
+    @staticmethod
+    def _apply_step_group_input(step: dict[str, Any], user_input: dict[str, Any]) -> None:
+        """Store group/depends_on from a submitted step form."""
+        group = (user_input.get(CONF_STEP_GROUP) or "").strip()
+        depends_on = [
+            dep.strip()
+            for dep in (user_input.get(CONF_STEP_DEPENDS_ON) or "").split(",")
+            if dep.strip() and dep.strip() != group
+        ]
+
+        if group:
+            step[CONF_STEP_GROUP] = group
+        else:
+            step.pop(CONF_STEP_GROUP, None)
+
+        if depends_on:
+            step[CONF_STEP_DEPENDS_ON] = depends_on
+        else:
+            step.pop(CONF_STEP_DEPENDS_ON, None)
+
+    @staticmethod
+    def _step_wait_schema(step: dict[str, Any]) -> dict[Any, Any]:
+        """Return the optional readiness fields for steps that target a device."""
+        return {
+            vol.Optional(
+                CONF_STEP_WAIT_STATE,
+                description={"suggested_value": step.get(CONF_STEP_WAIT_STATE, "")},
+            ): str,
+            vol.Optional(
+                CONF_STEP_WAIT_ATTRIBUTE,
+                description={"suggested_value": step.get(CONF_STEP_WAIT_ATTRIBUTE, "")},
+            ): str,
+        }
+
+    @staticmethod
+    def _apply_step_wait_input(step: dict[str, Any], user_input: dict[str, Any]) -> None:
+        """Store the readiness condition from a submitted step form."""
+        for key in (CONF_STEP_WAIT_STATE, CONF_STEP_WAIT_ATTRIBUTE):
+            value = (user_input.get(key) or "").strip()
+            if value:
+                step[key] = value
+            else:
+                step.pop(key, None)
+
+    def _step_call_schema(self, step: dict[str, Any]) -> dict[Any, Any]:
+        """Return the optional blocking-call and retry fields for steps that send a call.
+
+        The blocking checkbox shows the setting that applies to the step: its
+        own flag, or the activity default.
+        """
+        blocking = step.get(
+            CONF_BLOCKING, self.current_activity_data.get(CONF_BLOCKING, False)
+        )
+        return {
+            vol.Optional(CONF_BLOCKING, default=blocking): bool,
+            vol.Optional(
+                CONF_CALL_TIMEOUT,
+                description={"suggested_value": step.get(CONF_CALL_TIMEOUT)},
+            ): vol.All(int, vol.Range(min=1, max=120)),
+            vol.Optional(
+                CONF_STEP_RETRIES, default=step.get(CONF_STEP_RETRIES, 0)
+            ): vol.All(int, vol.Range(min=0, max=5)),
+        }
+
+    def _apply_step_call_input(
+        self, step: dict[str, Any], user_input: dict[str, Any]
+    ) -> None:
+        """Store the blocking-call and retry settings from a submitted step form.
+
+        The blocking flag is only stored when it differs from the activity
+        default (true or false), so steps keep following the default
+        otherwise.
+        """
+        blocking = bool(user_input.get(CONF_BLOCKING))
+        if blocking != bool(self.current_activity_data.get(CONF_BLOCKING, False)):
+            step[CONF_BLOCKING] = blocking
+        else:
+            step.pop(CONF_BLOCKING, None)
+
+        if user_input.get(CONF_CALL_TIMEOUT):
+            step[CONF_CALL_TIMEOUT] = user_input[CONF_CALL_TIMEOUT]
+        else:
+            step.pop(CONF_CALL_TIMEOUT, None)
+
+        if user_input.get(CONF_STEP_RETRIES):
+            step[CONF_STEP_RETRIES] = user_input[CONF_STEP_RETRIES]
+        else:
+            step.pop(CONF_STEP_RETRIES, None)
+
     async def async_step_step_menu(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -61,6 +181,8 @@ class StepsFlowMixin:
                     return await self.async_step_select_step_to_delete()
                 elif action == "reorder_step":
                     return await self.async_step_reorder_step()
+                elif action == "activity_settings":
+                    return await self.async_step_activity_settings()
                 elif action == "finish_activity":
                     # Save activity
                     if self.current_room not in self.rooms:
@@ -142,9 +264,23 @@ class StepsFlowMixin:
                 step_desc = f"{step_type} on {friendly_name}"
 
             # Add delay information if > 0
-            if delay_after > 0 and step_type != STEP_TYPE_DELAY:
+            wait_for = [
+                step[key]
+                for key in (CONF_STEP_WAIT_STATE, CONF_STEP_WAIT_ATTRIBUTE)
+                if step.get(key)
+            ]
+            if wait_for:
+                step_desc += f" (then wait for {' + '.join(wait_for)}"
+                step_desc += f", max {delay_after}s)" if delay_after > 0 else ")"
+            elif delay_after > 0 and step_type != STEP_TYPE_DELAY:
                 step_desc += f" (then wait {delay_after}s)"
 
+            # Add parallel group information
+            if step.get(CONF_STEP_GROUP):
+                step_desc += f" [{step[CONF_STEP_GROUP]}]"
+            if step.get(CONF_STEP_DEPENDS_ON):
+                step_desc += f" (after {', '.join(step[CONF_STEP_DEPENDS_ON])})"
+
             step_list.append(f"{idx}. {step_desc}")
 
         step_list_str = "\n".join(step_list) if step_list else "No steps added yet"
@@ -161,6 +297,8 @@ class StepsFlowMixin:
             if len(steps) >= 2:
                 actions["reorder_step"] = "Change step order"
 
+        actions["activity_settings"] = "Execution settings"
+
         # Finish always at the bottom
         actions["finish_activity"] = "Finish activity"
 
@@ -174,6 +312,106 @@ class StepsFlowMixin:
             },
         )
 
+    async def async_step_activity_settings(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Configure how the steps of the activity are executed and stopped."""
+        if user_input is not None:
+            self.current_activity_data[CONF_EXECUTION_MODE] = user_input.get(
+                CONF_EXECUTION_MODE, EXECUTION_MODE_SEQUENTIAL
+            )
+            self.current_activity_data[CONF_SHUTDOWN_ORDER] = user_input.get(
+                CONF_SHUTDOWN_ORDER, []
+            )
+            self.current_activity_data[CONF_SHUTDOWN_DELAY] = user_input.get(
+                CONF_SHUTDOWN_DELAY, 0
+            )
+            self.current_activity_data[CONF_BLOCKING] = user_input.get(
+                CONF_BLOCKING, False
+            )
+            self.current_activity_data[CONF_CALL_TIMEOUT] = user_input.get(
+                CONF_CALL_TIMEOUT, DEFAULT_CALL_TIMEOUT
+            )
+            self.current_activity_data[CONF_ADAPTIVE_DELAYS] = user_input.get(
+                CONF_ADAPTIVE_DELAYS, False
+            )
+            self.current_activity_data[CONF_ENFORCE] = user_input.get(
+                CONF_ENFORCE, False
+            )
+            _LOGGER.info(
+                "Updated execution settings of activity %s: %s",
+                self.current_activity,
+                user_input,
+            )
+
+            # Save if editing existing activity
+            if (self.current_room in self.rooms and
+                self.current_activity in self.rooms[self.current_room].get(CONF_ACTIVITIES, {})):
+                self.rooms[self.current_room][CONF_ACTIVITIES][self.current_activity] = self.current_activity_data
+                self._save_config()
+
+            return await self.async_step_step_menu()
+
+        current_mode = self.current_activity_data.get(
+            CONF_EXECUTION_MODE, EXECUTION_MODE_SEQUENTIAL
+        )
+        activity_entities = list(dict.fromkeys(
+            step[CONF_ENTITY_ID]
+            for step in self.current_activity_data.get(CONF_STEPS, [])
+            if step.get(CONF_ENTITY_ID)
+        ))
+        current_order = [
+            entity_id
+            for entity_id in self.current_activity_data.get(CONF_SHUTDOWN_ORDER, [])
+            if entity_id in activity_entities
+        ]
+        current_shutdown_delay = self.current_activity_data.get(CONF_SHUTDOWN_DELAY, 0)
+        current_blocking = self.current_activity_data.get(CONF_BLOCKING, False)
+        current_call_timeout = self.current_activity_data.get(
+            CONF_CALL_TIMEOUT, DEFAULT_CALL_TIMEOUT
+        )
+        current_adaptive = self.current_activity_data.get(CONF_ADAPTIVE_DELAYS, False)
+        current_enforce = self.current_activity_data.get(CONF_ENFORCE, False)
+
+        return self.async_show_form(
+            step_id="activity_settings",
+            data_schema=vol.Schema({
+                vol.Required(CONF_EXECUTION_MODE, default=current_mode): vol.In({
+                    EXECUTION_MODE_SEQUENTIAL: "Sequential (delays block all following steps)",
+                    EXECUTION_MODE_PER_ENTITY: "Per device (delays only block the same device)",
+                }),
+                vol.Optional(
+                    CONF_SHUTDOWN_ORDER,
+                    description={"suggested_value": current_order},
+                ): EntitySelector(
+                    EntitySelectorConfig(include_entities=activity_entities, multiple=True)
+                ),
+                vol.Optional(CONF_SHUTDOWN_DELAY, default=current_shutdown_delay): vol.All(
+                    int, vol.Range(min=0, max=60)
+                ),
+                vol.Optional(CONF_BLOCKING, default=current_blocking): bool,
+                vol.Optional(CONF_CALL_TIMEOUT, default=current_call_timeout): vol.All(
+                    int, vol.Range(min=1, max=120)
+                ),
+                vol.Optional(CONF_ADAPTIVE_DELAYS, default=current_adaptive): bool,
+                vol.Optional(CONF_ENFORCE, default=current_enforce): bool,
+            }),
+            description_placeholders={
+                "activity": self.current_activity or "",
+                "info": "In per-device mode every device runs on its own timeline. "
+                "Use groups or 'wait for groups' (with an entity ID) to link devices explicitly.\n\n"
+                "When the activity stops, all devices are turned off at the same time. "
+                "Devices listed in the shutdown order are turned off one after another in that order, "
+                "with the shutdown delay in between.\n\n"
+                "Blocking calls wait until the device's integration has processed each command "
+                "(up to the call timeout) before the step counts as done; a timeout marks the step as failed.\n\n"
+                "Learned warm-up delays replace the delay after each power-on step with the measured "
+                "warm-up time (95th percentile) once a device has been started 5 times.\n\n"
+                "Enforce settings re-applies input source, sound mode and volume steps "
+                "whenever a device drifts away from them while the activity is active.",
+            },
+        )
+
     async def async_step_add_step(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -287,6 +525,9 @@ class StepsFlowMixin:
                 # Get delay_after
                 delay_after = user_input.get(CONF_STEP_DELAY_AFTER, 0)
                 self.current_step_data[CONF_STEP_DELAY_AFTER] = delay_after
+                self._apply_step_group_input(self.current_step_data, user_input)
+                self._apply_step_wait_input(self.current_step_data, user_input)
+                self._apply_step_call_input(self.current_step_data, user_input)
 
                 # Get step-specific parameters
                 parameters = {}
@@ -364,6 +605,9 @@ class StepsFlowMixin:
         schema_dict[vol.Optional(CONF_STEP_DELAY_AFTER, default=0)] = vol.All(
             int, vol.Range(min=0, max=60)
         )
+        schema_dict.update(self._step_wait_schema(self.current_step_data))
+        schema_dict.update(self._step_call_schema(self.current_step_data))
+        schema_dict.update(self._step_group_schema(self.current_step_data))
 
         # Step-specific fields
         if step_type == STEP_TYPE_POWER_ON:
@@ -432,7 +676,9 @@ class StepsFlowMixin:
             description_placeholders={
                 "device": friendly_name,
                 "step_type": step_type,
-                "info": "Configure the parameters for this step. The delay is applied AFTER this step completes.",
+                "info": "Configure the parameters for this step. The delay is applied AFTER this step completes. "
+                "If a wait state or attribute is set, the step continues as soon as the device reports it "
+                "and the delay becomes the upper bound.",
             },
         )
 
@@ -447,6 +693,7 @@ class StepsFlowMixin:
                 delay = user_input.get(CONF_STEP_DELAY_AFTER, 1)
                 self.current_step_data[CONF_STEP_DELAY_AFTER] = delay
                 self.current_step_data[CONF_ENTITY_ID] = ""  # No entity for delay
+                self._apply_step_group_input(self.current_step_data, user_input)
 
                 # Add step to activity
                 if CONF_STEPS not in self.current_activity_data:
@@ -470,6 +717,7 @@ class StepsFlowMixin:
                 vol.Required(CONF_STEP_DELAY_AFTER, default=1): vol.All(
                     int, vol.Range(min=1, max=60)
                 ),
+                **self._step_group_schema(self.current_step_data),
             }),
             errors=errors,
             description_placeholders={
@@ -494,6 +742,8 @@ class StepsFlowMixin:
                 else:
                     self.current_step_data[CONF_ENTITY_ID] = ""  # No entity for action call
                     self.current_step_data[CONF_STEP_DELAY_AFTER] = delay_after
+                    self._apply_step_group_input(self.current_step_data, user_input)
+                    self._apply_step_call_input(self.current_step_data, user_input)
 
                     parameters = {
                         CONF_ACTION: action,
@@ -536,6 +786,8 @@ class StepsFlowMixin:
                 vol.Optional(CONF_STEP_DELAY_AFTER, default=0): vol.All(
                     int, vol.Range(min=0, max=60)
                 ),
+                **self._step_call_schema(self.current_step_data),
+                **self._step_group_schema(self.current_step_data),
             }),
             errors=errors,
             description_placeholders={
@@ -763,6 +1015,11 @@ class StepsFlowMixin:
                 # Update delay_after
                 delay_after = user_input.get(CONF_STEP_DELAY_AFTER, 0)
                 current_step[CONF_STEP_DELAY_AFTER] = delay_after
+                self._apply_step_group_input(current_step, user_input)
+                if step_type not in (STEP_TYPE_DELAY, STEP_TYPE_CALL_ACTION):
+                    self._apply_step_wait_input(current_step, user_input)
+                if step_type != STEP_TYPE_DELAY:
+                    self._apply_step_call_input(current_step, user_input)
 
                 # Update step-specific parameters
                 parameters = {}
@@ -879,6 +1136,11 @@ class StepsFlowMixin:
             schema_dict[vol.Optional(CONF_STEP_DELAY_AFTER, default=current_delay)] = vol.All(
                 int, vol.Range(min=0, max=60)
             )
+        if step_type not in (STEP_TYPE_DELAY, STEP_TYPE_CALL_ACTION):
+            schema_dict.update(self._step_wait_schema(current_step))
+        if step_type != STEP_TYPE_DELAY:
+            schema_dict.update(self._step_call_schema(current_step))
+        schema_dict.update(self._step_group_schema(current_step))
 
         # Step-specific fields with current values
         if step_type == STEP_TYPE_POWER_ON:
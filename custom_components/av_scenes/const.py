@@ -27,6 +27,37 @@ CONF_STEP_ID: Final = "step_id"
 CONF_STEP_TYPE: Final = "step_type"
 CONF_STEP_DELAY_AFTER: Final = "delay_after"
 CONF_STEP_PARAMETERS: Final = "parameters"
+# Optional parallel branch of a step; steps in different groups run concurrently
+CONF_STEP_GROUP: Final = "group"
+# Groups whose earlier steps must have finished before a step starts
+CONF_STEP_DEPENDS_ON: Final = "depends_on"
+# Readiness condition: continue as soon as the entity reports this state ...
+CONF_STEP_WAIT_STATE: Final = "wait_state"
+# ... and/or this attribute is populated; delay_after becomes the upper bound
+CONF_STEP_WAIT_ATTRIBUTE: Final = "wait_attribute"
+
+# Activity-level execution settings
+CONF_EXECUTION_MODE: Final = "execution_mode"
+# All steps share one timeline (unless they are assigned to groups)
+EXECUTION_MODE_SEQUENTIAL: Final = "sequential"
+# Every entity has its own timeline; delay_after only blocks the same entity
+EXECUTION_MODE_PER_ENTITY: Final = "per_entity"
+EXECUTION_MODES: Final = [EXECUTION_MODE_SEQUENTIAL, EXECUTION_MODE_PER_ENTITY]
+# Devices that must be turned off one after another, in this order; all other
+# devices are turned off concurrently together with the first one
+CONF_SHUTDOWN_ORDER: Final = "shutdown_order"
+# Wait between two ordered shutdown stages (seconds)
+CONF_SHUTDOWN_DELAY: Final = "shutdown_delay"
+# Blocking service calls: wait for the integration to finish the call (bool),
+# with call_timeout in seconds; set per activity (default) or per step
+CONF_BLOCKING: Final = "blocking"
+CONF_CALL_TIMEOUT: Final = "call_timeout"
+# Re-send a step up to this many times until the device confirms the target
+CONF_STEP_RETRIES: Final = "retries"
+# Use learned warm-up times (p95) instead of the configured power-on delays
+CONF_ADAPTIVE_DELAYS: Final = "adaptive_delays"
+# Re-apply source, sound mode and volume steps when a device drifts away
+CONF_ENFORCE: Final = "enforce"
 
 # Light-specific configuration
 CONF_BRIGHTNESS: Final = "brightness"
@@ -76,14 +107,58 @@ ACTIVITY_STATE_STOPPING: Final = "stopping"
 
 # Default values
 DEFAULT_POWER_ON_DELAY: Final = 2
+# Upper bound for readiness waits of steps without delay_after (seconds)
+DEFAULT_WAIT_TIMEOUT: Final = 30
+# Timeout of blocking service calls (seconds)
+DEFAULT_CALL_TIMEOUT: Final = 10
+# Retries: time allowed for a device to confirm a step, and the first backoff
+# (doubled on every further attempt), in seconds
+VERIFY_TIMEOUT: Final = 5
+RETRY_BACKOFF: Final = 1
+# Share of an activity's expected device states (power, source, sound mode)
+# that must match before reconciliation adopts it as running
+RECONCILE_THRESHOLD: Final = 0.75
+# External power changes of a room's devices are collected for this long
+# before the room is re-checked (seconds)
+TRACKING_DELAY: Final = 2
+# Drift enforcement: wait for a drifted device to settle before correcting,
+# and correct a room at most ENFORCE_MAX_CORRECTIONS times per ENFORCE_WINDOW
+# (seconds)
+ENFORCE_DELAY: Final = 3
+ENFORCE_MAX_CORRECTIONS: Final = 3
+ENFORCE_WINDOW: Final = 60
+# Minimum interval between progress updates of running activities (seconds)
+PROGRESS_UPDATE_INTERVAL: Final = 0.5
+
+# hass.data[DOMAIN] key of the domain-wide room registry
+DATA_ROOM_REGISTRY: Final = "room_registry"
+# hass.data[DOMAIN] key of the background job tracker
+DATA_JOB_TRACKER: Final = "job_tracker"
+# hass.data[DOMAIN] key of the learned warm-up times
+DATA_WARMUP: Final = "warmup"
+# hass.data[DOMAIN] key of the shared device ownership table
+DATA_OWNERSHIP: Final = "ownership"
 
 # Services
 SERVICE_START_ACTIVITY: Final = "start_activity"
 SERVICE_STOP_ACTIVITY: Final = "stop_activity"
 SERVICE_RELOAD: Final = "reload"
+SERVICE_START_ACTIVITIES: Final = "start_activities"
+SERVICE_STOP_ALL: Final = "stop_all"
+SERVICE_WAIT_FOR_JOB: Final = "wait_for_job"
+SERVICE_RECONCILE: Final = "reconcile"
+
+# Events
+EVENT_JOB_FINISHED: Final = "av_scenes_job_finished"
 
 # Attributes
 ATTR_ROOM: Final = "room"
 ATTR_ACTIVITY: Final = "activity"
 ATTR_CURRENT_ACTIVITY: Final = "current_activity"
 ATTR_AVAILABLE_ACTIVITIES: Final = "available_activities"
+ATTR_ACTIVITIES: Final = "activities"  # room -> activity mapping
+ATTR_ROOMS: Final = "rooms"
+ATTR_MAX_CONCURRENT: Final = "max_concurrent"
+ATTR_WAIT: Final = "wait"
+ATTR_JOB_ID: Final = "job_id"
+ATTR_TIMEOUT: Final = "timeout"
@@ -2,58 +2,84 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 import logging
-from typing import Any, Callable, Coroutine
+from functools import partial
+import time
+from typing import Any, Callable, Coroutine, Iterable
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.const import (
     ATTR_ENTITY_ID,
-    SERVICE_TURN_ON,
-    SERVICE_TURN_OFF,
+    STATE_UNKNOWN,
 )
+from homeassistant.util.read_only_dict import ReadOnlyDict
 
 from .const import (
     DOMAIN,
     CONF_ROOMS,
-    CONF_ACTIVITIES,
-    CONF_ENTITY_ID,
-    CONF_INPUT_SOURCE,
-    CONF_VOLUME_LEVEL,
-    CONF_SOUND_MODE,
-    CONF_BRIGHTNESS,
-    CONF_COLOR_TEMP,
-    CONF_TRANSITION,
-    CONF_POSITION,
-    CONF_TILT_POSITION,
-    CONF_ACTION,
-    CONF_SERVICE_DATA,
     ACTIVITY_STATE_IDLE,
     ACTIVITY_STATE_STARTING,
     ACTIVITY_STATE_ACTIVE,
     ACTIVITY_STATE_STOPPING,
-    CONF_STEPS,
-    CONF_STEP_TYPE,
-    CONF_STEP_DELAY_AFTER,
-    CONF_STEP_PARAMETERS,
+    DEFAULT_WAIT_TIMEOUT,
+    ENFORCE_DELAY,
+    ENFORCE_MAX_CORRECTIONS,
+    ENFORCE_WINDOW,
+    PROGRESS_UPDATE_INTERVAL,
+    TRACKING_DELAY,
+    RECONCILE_THRESHOLD,
+    RETRY_BACKOFF,
+    VERIFY_TIMEOUT,
     STEP_TYPE_POWER_ON,
     STEP_TYPE_POWER_OFF,
-    STEP_TYPE_SET_SOURCE,
-    STEP_TYPE_SET_VOLUME,
-    STEP_TYPE_SET_SOUND_MODE,
-    STEP_TYPE_SET_BRIGHTNESS,
-    STEP_TYPE_SET_COLOR_TEMP,
-    STEP_TYPE_SET_POSITION,
-    STEP_TYPE_SET_TILT,
-    STEP_TYPE_CALL_ACTION,
-    STEP_TYPE_DELAY,
+)
+from .learning import async_get_warmup_learner
+from .ownership import async_get_device_ownership
+from .plan import (
+    ActivityPlan,
+    RoomPlan,
+    ServiceCallPlan,
+    ShutdownStage,
+    StepPlan,
+    OFF_STATES,
+    compile_rooms,
+    index_entities,
+    is_powered_on,
+    plan_shutdown,
+    target_reached,
+)
+from .report import (
+    RUN_STATUS_COMPLETED,
+    RUN_STATUS_FAILED,
+    RUN_STATUS_RUNNING,
+    RUN_STATUS_SUPERSEDED,
+    STEP_STATUS_FAILED,
+    STEP_STATUS_NOT_READY,
+    STEP_STATUS_OK,
+    STEP_STATUS_SKIPPED,
+    STEP_STATUS_TIMEOUT,
+    STEP_STATUS_UNVERIFIED,
+    RunReport,
+    StepReport,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
-# Type alias for step handler coroutines
-_StepHandler = Callable[..., Coroutine[Any, Any, None]]
+
+STORAGE_VERSION = 1
+# Persisting room state is delayed and coalesced (seconds)
+_STATE_SAVE_DELAY = 2
+
+
+def state_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding the room state of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.state.{entry_id}")
 
 
 class AVScenesCoordinator(DataUpdateCoordinator):
@@ -70,360 +96,1162 @@ class AVScenesCoordinator(DataUpdateCoordinator):
         )
         self.entry = entry
         self.rooms: dict[str, dict[str, Any]] = {}
+        # Compiled execution plans, rebuilt whenever the config is (re)loaded
+        self.plans: dict[str, RoomPlan] = {}
         self.active_activities: dict[str, str] = {}  # room_id -> activity_name
         self.activity_states: dict[str, str] = {}  # room_id -> state
         self._room_locks: dict[str, asyncio.Lock] = {}
+        # Currently running start/stop per room; cancelled by newer requests
+        self._room_tasks: dict[str, asyncio.Task[None]] = {}
+        # Latest request number per room; queued requests that are no longer
+        # the latest are dropped before they run (last write wins).
+        self._room_requests: dict[str, int] = {}
+        # Devices this room has actually switched on (room_id -> entity_ids);
+        # after an interrupted run this is the partial device set.
+        self.room_entities: dict[str, set[str]] = {}
+        # room_id -> (activity_name, step, total) of a run that was cancelled
+        self.interrupted_runs: dict[str, tuple[str, int, int]] = {}
+        # room_id -> activity_name currently being started
+        self.starting_activities: dict[str, str] = {}
         # (current_step_index, total_steps) — 0-based index, 0/0 when idle
         self.activity_progress: dict[str, tuple[int, int]] = {}
-
-        # Dispatch table: step_type -> handler method
-        # Built after __init__ so self is available.
-        self._step_dispatch: dict[str, _StepHandler] = {
-            STEP_TYPE_POWER_ON: self._step_power_on,
-            STEP_TYPE_POWER_OFF: self._turn_off_device,
-            STEP_TYPE_SET_SOURCE: self._step_set_source,
-            STEP_TYPE_SET_VOLUME: self._step_set_volume,
-            STEP_TYPE_SET_SOUND_MODE: self._step_set_sound_mode,
-            STEP_TYPE_SET_BRIGHTNESS: self._step_set_brightness,
-            STEP_TYPE_SET_COLOR_TEMP: self._step_set_color_temp,
-            STEP_TYPE_SET_POSITION: self._step_set_position,
-            STEP_TYPE_SET_TILT: self._step_set_tilt,
-            STEP_TYPE_CALL_ACTION: self._step_call_action,
-            # STEP_TYPE_DELAY: no handler — the delay is applied via delay_after only
-        }
+        # Entity callbacks per room, so a change in one room only refreshes
+        # that room's entities (see async_add_room_listener)
+        self._room_listeners: dict[str, list[CALLBACK_TYPE]] = {}
+        # Step progress is published at most every PROGRESS_UPDATE_INTERVAL
+        # per room; state changes (starting/active/idle) are written at once.
+        self._progress_debouncers: dict[str, Debouncer] = {}
+        self.warmup = async_get_warmup_learner(hass)
+        # Devices shared with rooms of this and other entries
+        self.ownership = async_get_device_ownership(hass)
+        # Room state survives restarts and reloads
+        self._store = state_store(hass, entry.entry_id)
+        self._state_restored = False
+        # entity_id -> (room_id, activity_name, step_index) of every referenced
+        # device, watched by one state subscription to follow external changes
+        self.entity_index: ReadOnlyDict[str, tuple[tuple[str, str, int], ...]] = (
+            ReadOnlyDict()
+        )
+        self._unsub_tracking: CALLBACK_TYPE | None = None
+        self._tracking_debouncers: dict[str, Debouncer] = {}
+        # Rooms with a device of their own switched on since the last check
+        self._powered_on_rooms: set[str] = set()
+        # Drift enforcement: pending corrections and recent correction times
+        self._enforce_debouncers: dict[str, Debouncer] = {}
+        self._corrections: dict[str, deque[float]] = {}
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch data from config."""
         self.rooms = self.entry.data.get(CONF_ROOMS, {})
+        self.plans = compile_rooms(self.rooms)
+        self._async_track_entities(index_entities(self.plans))
+        await self.warmup.async_load()
+        if not self._state_restored:
+            self._state_restored = True
+            self._restore_state(await self._store.async_load() or {})
+            for room_id in self.rooms:
+                self._async_sync_ownership(room_id)
         return {
             "rooms": self.rooms,
             "active_activities": self.active_activities,
             "activity_states": self.activity_states,
         }
 
-    async def async_start_activity(self, room_id: str, activity_name: str) -> None:
-        """Start an activity in a room."""
-        lock = self._room_locks.setdefault(room_id, asyncio.Lock())
-        async with lock:
-            await self._async_start_activity_locked(room_id, activity_name)
+    async def async_shutdown(self) -> None:
+        """Cancel pending progress updates and write the room state."""
+        await super().async_shutdown()
+        if self._unsub_tracking is not None:
+            self._unsub_tracking()
+            self._unsub_tracking = None
+        for debouncer in self._progress_debouncers.values():
+            debouncer.async_cancel()
+        for debouncer in self._tracking_debouncers.values():
+            debouncer.async_cancel()
+        for debouncer in self._enforce_debouncers.values():
+            debouncer.async_cancel()
+        self.ownership.async_release_entry(self.entry.entry_id)
+        # A reloaded entry reads the state right away, so do not delay
+        await self._store.async_save(self._state_to_save())
 
-    async def _async_start_activity_locked(
-        self, room_id: str, activity_name: str
-    ) -> None:
-        """Start an activity in a room (must be called with room lock held)."""
-        _LOGGER.info("Starting activity '%s' in room '%s'", activity_name, room_id)
+    @callback
+    def _state_to_save(self) -> dict[str, Any]:
+        """Return the room state to persist."""
+        rooms: dict[str, Any] = {}
+        for room_id in self.rooms:
+            entities = self.room_entities.get(room_id)
+            state = self.activity_states.get(room_id, ACTIVITY_STATE_IDLE)
+            if not entities and state == ACTIVITY_STATE_IDLE:
+                continue
+            rooms[room_id] = {
+                "activity": self.starting_activities.get(
+                    room_id, self.active_activities.get(room_id)
+                ),
+                "state": state,
+                "progress": list(self.activity_progress.get(room_id, (0, 0))),
+                "entities": sorted(entities or ()),
+                "interrupted": list(self.interrupted_runs.get(room_id, ())) or None,
+            }
+        return {"rooms": rooms}
 
-        if room_id not in self.rooms:
-            _LOGGER.error("Room '%s' not found", room_id)
-            return
+    def _restore_state(self, data: dict[str, Any]) -> None:
+        """Restore the room state saved before a restart or reload.
 
-        room = self.rooms[room_id]
-        activities = room.get(CONF_ACTIVITIES, {})
+        A run that was still starting or stopping is restored as interrupted,
+        with the devices it had switched on, so the next start or stop
+        continues from there instead of cold-starting everything.  Rooms and
+        activities that no longer exist are dropped.
+        """
+        for room_id, saved in data.get("rooms", {}).items():
+            if room_id not in self.plans:
+                continue
+            activity_name = saved.get("activity")
+            if self.get_activity_plan(room_id, activity_name or "") is None:
+                activity_name = None
+            entities = set(saved.get("entities") or ())
+            if entities:
+                self.room_entities[room_id] = entities
 
-        if activity_name not in activities:
-            _LOGGER.error("Activity '%s' not found in room '%s'", activity_name, room_id)
+            if saved.get("state") == ACTIVITY_STATE_ACTIVE and activity_name:
+                self.active_activities[room_id] = activity_name
+                self.activity_states[room_id] = ACTIVITY_STATE_ACTIVE
+                self.activity_progress[room_id] = tuple(saved.get("progress") or (0, 0))
+                continue
+
+            interrupted = saved.get("interrupted")
+            if not interrupted and saved.get("state") in (
+                ACTIVITY_STATE_STARTING,
+                ACTIVITY_STATE_STOPPING,
+            ):
+                step, total = saved.get("progress") or (0, 0)
+                interrupted = (activity_name, step, total)
+            if interrupted and interrupted[0] and self.get_activity_plan(
+                room_id, interrupted[0]
+            ):
+                self.interrupted_runs[room_id] = tuple(interrupted)
+            self.activity_states[room_id] = ACTIVITY_STATE_IDLE
+
+        if data:
+            _LOGGER.debug(
+                "Restored room state: active %s, interrupted %s",
+                self.active_activities,
+                self.interrupted_runs,
+            )
+
+    @callback
+    def _async_sync_ownership(self, room_id: str) -> None:
+        """Publish the devices a starting or active room keeps on.
+
+        Idle rooms own nothing, even if some of their devices are on (e.g.
+        because another room uses them).
+        """
+        owned = (
+            self.room_entities.get(room_id, ())
+            if room_id in self.active_activities or room_id in self.starting_activities
+            else ()
+        )
+        self.ownership.async_set((self.entry.entry_id, room_id), owned)
+
+    def _shared_entities(self, room_id: str, entities: Iterable[str]) -> set[str]:
+        """Return the devices that another room still keeps on."""
+        owner = (self.entry.entry_id, room_id)
+        return {
+            entity_id
+            for entity_id in entities
+            if self.ownership.in_use_elsewhere(owner, entity_id)
+        }
+
+    def _release_shared(self, room_id: str, entities: set[str]) -> set[str]:
+        """Drop shared devices from a turn-off set, leaving them on.
+
+        The devices stay on for the other rooms and are no longer owned by
+        this one; the remaining devices are returned.
+        """
+        shared = self._shared_entities(room_id, entities)
+        if not shared:
+            return entities
+        _LOGGER.info(
+            "Leaving shared devices on for other rooms: %s",
+            ", ".join(
+                f"{entity_id} ({self.ownership.ref_count(entity_id)})"
+                for entity_id in sorted(shared)
+            ),
+        )
+        self.room_entities.get(room_id, set()).difference_update(shared)
+        self._async_sync_ownership(room_id)
+        return entities - shared
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Persist the room state after a short delay."""
+        self._store.async_delay_save(self._state_to_save, _STATE_SAVE_DELAY)
+
+    @callback
+    def async_add_room_listener(
+        self, room_id: str, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for state, activity and progress changes of one room."""
+        listeners = self._room_listeners.setdefault(room_id, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_update_room_listeners(self, room_id: str) -> None:
+        """Notify the entities of one room."""
+        for update_callback in list(self._room_listeners.get(room_id, ())):
+            update_callback()
+
+    def _progress_debouncer(self, room_id: str) -> Debouncer:
+        """Return the progress throttle of a room."""
+        if room_id not in self._progress_debouncers:
+            self._progress_debouncers[room_id] = Debouncer(
+                self.hass,
+                _LOGGER,
+                cooldown=PROGRESS_UPDATE_INTERVAL,
+                immediate=True,
+                function=partial(self._async_update_room_listeners, room_id),
+            )
+        return self._progress_debouncers[room_id]
+
+    @callback
+    def _async_publish_state(self, room_id: str) -> None:
+        """Write a room's state now, superseding throttled progress."""
+        self._async_sync_ownership(room_id)
+        self._progress_debouncer(room_id).async_cancel()
+        self._async_update_room_listeners(room_id)
+        self._async_schedule_save()
+
+    @callback
+    def _async_track_entities(
+        self, index: ReadOnlyDict[str, tuple[tuple[str, str, int], ...]]
+    ) -> None:
+        """Watch the referenced devices, resubscribing when the set changed."""
+        changed = index.keys() != self.entity_index.keys()
+        self.entity_index = index
+        if not changed and self._unsub_tracking is not None:
             return
+        if self._unsub_tracking is not None:
+            self._unsub_tracking()
+            self._unsub_tracking = None
+        if index:
+            self._unsub_tracking = async_track_state_change_event(
+                self.hass, list(index), self._async_tracked_state_changed
+            )
 
-        new_activity = activities[activity_name]
-        new_steps = new_activity.get(CONF_STEPS, [])
+    @callback
+    def _async_tracked_state_changed(self, event: Event) -> None:
+        """Queue a re-check of the rooms of a device that powered on or off.
 
-        if not new_steps:
-            _LOGGER.warning("Activity '%s' has no steps configured", activity_name)
+        Only power transitions count, and only a device of the room's own
+        switching on (not one held by another room) may lead to adopting an
+        activity; devices turning off, or reporting attribute updates while
+        they cool down, could otherwise re-adopt an activity that was just
+        stopped.  Attribute updates of running devices are checked for drift
+        instead.  Rooms with a run in flight are skipped, their own run
+        decides the state.
+        """
+        entity_id: str = event.data["entity_id"]
+        old_state: State | None = event.data.get("old_state")
+        new_state: State | None = event.data.get("new_state")
+        was_on = old_state is not None and old_state.state not in OFF_STATES
+        is_on = new_state is not None and new_state.state not in OFF_STATES
+        if was_on == is_on:
+            if is_on:
+                self._async_check_drift(entity_id, new_state)
             return
+        for room_id in {ref[0] for ref in self.entity_index.get(entity_id, ())}:
+            if room_id in self._room_tasks:
+                continue
+            if is_on and not self.ownership.in_use_elsewhere(
+                (self.entry.entry_id, room_id), entity_id
+            ):
+                self._powered_on_rooms.add(room_id)
+            self.hass.async_create_task(
+                self._tracking_debouncer(room_id).async_call()
+            )
 
-        # Smart switching: turn off devices that are no longer needed
-        if room_id in self.active_activities:
-            old_activity_name = self.active_activities[room_id]
-            if old_activity_name != activity_name:
-                _LOGGER.info(
-                    "Switching from '%s' to '%s'", old_activity_name, activity_name
+    @callback
+    def _async_check_drift(self, entity_id: str, state: State | None) -> None:
+        """Queue a correction if a device left its active activity's targets."""
+        for room_id in {ref[0] for ref in self.entity_index.get(entity_id, ())}:
+            activity_name = self.active_activities.get(room_id)
+            if activity_name is None or room_id in self._room_tasks:
+                continue
+            plan = self.get_activity_plan(room_id, activity_name)
+            if plan is None:
+                continue
+            if any(
+                self._is_drifted(step, state) for step in plan.enforced.get(entity_id, ())
+            ):
+                self.hass.async_create_task(
+                    self._enforce_debouncer(room_id).async_call()
                 )
-                old_steps = activities.get(old_activity_name, {}).get(CONF_STEPS, [])
-                old_entities = self._get_entities_from_steps(old_steps)
-                new_entities = self._get_entities_from_steps(new_steps)
-                entities_to_turn_off = old_entities - new_entities
-
-                if entities_to_turn_off:
-                    _LOGGER.info(
-                        "Turning off devices no longer needed: %s", entities_to_turn_off
-                    )
-                    for entity_id in entities_to_turn_off:
-                        try:
-                            await self._turn_off_device(entity_id)
-                        except Exception as ex:
-                            _LOGGER.error("Error turning off %s: %s", entity_id, ex)
 
-        self.activity_states[room_id] = ACTIVITY_STATE_STARTING
-        self.activity_progress[room_id] = (0, len(new_steps))
-        self.async_update_listeners()
+    @staticmethod
+    def _is_drifted(step: StepPlan, state: State | None) -> bool:
+        """Return True if a running device reports a value other than the step's.
 
-        for idx, step in enumerate(new_steps, 1):
-            step_type = step.get(CONF_STEP_TYPE)
-            entity_id = step.get(CONF_ENTITY_ID, "")
-            delay_after = step.get(CONF_STEP_DELAY_AFTER, 0)
-            parameters = step.get(CONF_STEP_PARAMETERS, {})
+        A missing attribute is not drift, many devices drop it while switching.
+        """
+        if state is None or step.target_attribute is None:
+            return False
+        if state.attributes.get(step.target_attribute) is None:
+            return False
+        return not target_reached(
+            step.step_type, step.target_attribute, step.target_value, state
+        )
 
-            self.activity_progress[room_id] = (idx, len(new_steps))
-            self.async_update_listeners()
+    def _enforce_debouncer(self, room_id: str) -> Debouncer:
+        """Return the debouncer collecting a room's drifted devices."""
+        if room_id not in self._enforce_debouncers:
+            self._enforce_debouncers[room_id] = Debouncer(
+                self.hass,
+                _LOGGER,
+                cooldown=ENFORCE_DELAY,
+                immediate=False,
+                function=partial(self._async_enforce_room, room_id),
+            )
+        return self._enforce_debouncers[room_id]
+
+    async def _async_enforce_room(self, room_id: str) -> None:
+        """Re-apply the drifted steps of a room's active activity.
 
+        Only the steps whose device still reports another value are sent
+        again.  A room is corrected at most ENFORCE_MAX_CORRECTIONS times per
+        ENFORCE_WINDOW, so a device that keeps switching back (or a user who
+        insists) does not end up in a tug of war.
+        """
+        activity_name = self.active_activities.get(room_id)
+        if activity_name is None or room_id in self._room_tasks:
+            return
+        plan = self.get_activity_plan(room_id, activity_name)
+        if plan is None:
+            return
+        # step index -> (step, drifted entities)
+        drifted: dict[int, tuple[StepPlan, list[str]]] = {}
+        for entity_id, steps in plan.enforced.items():
+            for step in steps:
+                if self._is_drifted(step, self.hass.states.get(entity_id)):
+                    drifted.setdefault(step.index, (step, []))[1].append(entity_id)
+        if not drifted:
+            return
+
+        now = time.monotonic()
+        corrections = self._corrections.setdefault(room_id, deque())
+        while corrections and now - corrections[0] > ENFORCE_WINDOW:
+            corrections.popleft()
+        if len(corrections) >= ENFORCE_MAX_CORRECTIONS:
+            _LOGGER.warning(
+                "Room '%s' keeps drifting from '%s', not correcting it again "
+                "within %s seconds",
+                room_id,
+                activity_name,
+                ENFORCE_WINDOW,
+            )
+            return
+        corrections.append(now)
+
+        for _, (step, entity_ids) in sorted(drifted.items()):
             _LOGGER.info(
-                "Executing step %d/%d: %s on %s", idx, len(new_steps), step_type, entity_id
+                "Re-applying step %d (%s) of '%s' to %s",
+                step.index,
+                step.step_type,
+                activity_name,
+                ", ".join(entity_ids),
+            )
+            await self._async_call(
+                self._step_call(step, entity_ids), tuple(entity_ids), step.call_timeout
             )
 
-            try:
-                await self._execute_step(step_type, entity_id, parameters)
-            except Exception as ex:
-                _LOGGER.error("Error executing step %d (%s): %s", idx, step_type, ex)
-                # Continue with next step even if this one fails
+    def _tracking_debouncer(self, room_id: str) -> Debouncer:
+        """Return the debouncer collecting a room's external power changes."""
+        if room_id not in self._tracking_debouncers:
+            self._tracking_debouncers[room_id] = Debouncer(
+                self.hass,
+                _LOGGER,
+                cooldown=TRACKING_DELAY,
+                immediate=False,
+                function=partial(self._async_track_room, room_id),
+            )
+        return self._tracking_debouncers[room_id]
 
-            if delay_after > 0:
-                _LOGGER.debug("Waiting %s seconds after step %d", delay_after, idx)
-                await asyncio.sleep(delay_after)
+    @callback
+    def _async_track_room(self, room_id: str) -> None:
+        """Follow devices that were switched outside of AV Scenes.
 
-        self.active_activities[room_id] = activity_name
-        self.activity_states[room_id] = ACTIVITY_STATE_ACTIVE
-        self.activity_progress[room_id] = (len(new_steps), len(new_steps))
-        self.async_update_listeners()
+        A room is marked idle once all of its devices are off (devices that
+        another room keeps on do not count).  An idle room is reconciled,
+        adopting the activity its devices now match, only after one of its own
+        devices was switched on.
+        """
+        powered_on = room_id in self._powered_on_rooms
+        self._powered_on_rooms.discard(room_id)
+        room_plan = self.plans.get(room_id)
+        if room_plan is None or room_id in self._room_tasks:
+            return
+        owner = (self.entry.entry_id, room_id)
+        if not any(
+            self._is_on(entity_id)
+            and not self.ownership.in_use_elsewhere(owner, entity_id)
+            for entity_id in room_plan.entities
+        ):
+            if (
+                room_id in self.active_activities
+                or room_id in self.interrupted_runs
+                or self.room_entities.get(room_id)
+            ):
+                _LOGGER.info(
+                    "All devices of room '%s' were switched off externally", room_id
+                )
+                self.active_activities.pop(room_id, None)
+                self.interrupted_runs.pop(room_id, None)
+                self.room_entities.pop(room_id, None)
+                self.activity_states[room_id] = ACTIVITY_STATE_IDLE
+                self.activity_progress.pop(room_id, None)
+                self._async_publish_state(room_id)
+            return
+        if powered_on and room_id not in self.active_activities:
+            self.async_reconcile(room_id)
 
-        _LOGGER.info(
-            "Activity '%s' started successfully in room '%s'", activity_name, room_id
-        )
+    def get_activity_plan(self, room_id: str, activity_name: str) -> ActivityPlan | None:
+        """Return the compiled plan of an activity, if it exists."""
+        room_plan = self.plans.get(room_id)
+        if room_plan is None:
+            return None
+        return room_plan.activities.get(activity_name)
 
-    def _get_entities_from_steps(self, steps: list[dict[str, Any]]) -> set[str]:
-        """Extract unique entity IDs from a list of steps."""
-        return {
-            step[CONF_ENTITY_ID]
-            for step in steps
-            if step.get(CONF_ENTITY_ID, "").strip()
-        }
+    def _is_on(self, entity_id: str) -> bool:
+        """Return True if the entity reports an on-like state."""
+        state = self.hass.states.get(entity_id)
+        return state is not None and state.state not in OFF_STATES
 
-    async def async_stop_activity(self, room_id: str) -> None:
-        """Stop the current activity in a room."""
-        lock = self._room_locks.setdefault(room_id, asyncio.Lock())
-        async with lock:
-            await self._async_stop_activity_locked(room_id)
+    def _score_activity(self, room_plan: RoomPlan, plan: ActivityPlan) -> float:
+        """Return how well the live states match an activity (0..1).
 
-    async def _async_stop_activity_locked(self, room_id: str) -> None:
-        """Stop the current activity in a room (must be called with room lock held)."""
-        if room_id not in self.active_activities:
-            _LOGGER.debug("No active activity in room '%s'", room_id)
-            return
+        The share of the activity's own expected states (power, source, sound
+        mode) that are live is scaled by the share of the room's other devices
+        that are off.  An activity none of whose powered-on devices is on
+        scores 0, so a room that is completely off never matches.
+        """
+        checks = 0
+        hits = 0
+        powered = False
+        for entity_id, step_type, attribute, value in plan.expectations:
+            checks += 1
+            if attribute is None:
+                is_on = self._is_on(entity_id)
+                hits += is_on == value
+                powered |= value and is_on
+            else:
+                hits += target_reached(
+                    step_type, attribute, value, self.hass.states.get(entity_id)
+                )
+        if not powered:
+            return 0.0
 
-        activity_name = self.active_activities[room_id]
-        _LOGGER.info("Stopping activity '%s' in room '%s'", activity_name, room_id)
+        others = room_plan.entities - plan.entities
+        off = sum(not self._is_on(entity_id) for entity_id in others)
+        return hits / checks * (off / len(others) if others else 1.0)
 
-        self.activity_states[room_id] = ACTIVITY_STATE_STOPPING
-        self.async_update_listeners()
-
-        room = self.rooms[room_id]
-        steps = room.get(CONF_ACTIVITIES, {}).get(activity_name, {}).get(CONF_STEPS, [])
-
-        # Build an ordered, deduplicated (entity_id, delay_after) list.
-        # Preserve first-occurrence order; track the highest delay_after seen per entity
-        # so that the shutdown sequence respects the original timing requirements
-        # (e.g. a TV that needs 5 s to power up also needs time to shut down cleanly).
-        entity_delays: dict[str, int] = {}   # entity_id -> max delay_after across all steps
-        entity_order: list[str] = []
-        for step in steps:
-            entity_id = step.get(CONF_ENTITY_ID, "").strip()
-            if not entity_id:
+    @callback
+    def async_reconcile(self, room_id: str | None = None) -> dict[str, Any]:
+        """Infer the running activity of rooms from live device states.
+
+        Each activity is scored against the current states; the best one at
+        or above RECONCILE_THRESHOLD is adopted as active (the current one wins
+        ties).  A room without a match is marked idle, remembering which of
+        its devices are on so the next start only touches what differs.
+        Rooms with a start or stop in progress are left alone.
+        """
+        results: dict[str, Any] = {}
+        for rid in [room_id] if room_id else list(self.plans):
+            room_plan = self.plans.get(rid)
+            if room_plan is None or rid in self._room_tasks:
+                continue
+
+            current = self.active_activities.get(rid)
+            scores = {
+                name: self._score_activity(room_plan, plan)
+                for name, plan in room_plan.activities.items()
+            }
+            best = max(
+                scores,
+                key=lambda name: (scores[name], name == current),
+                default=None,
+            )
+            score = scores[best] if best is not None else 0.0
+            adopted = best if score >= RECONCILE_THRESHOLD else None
+            results[rid] = {"activity": adopted, "score": round(score, 2)}
+
+            on = {entity_id for entity_id in room_plan.entities if self._is_on(entity_id)}
+            if adopted == current and (
+                adopted is not None or self.room_entities.get(rid, set()) == on
+            ):
                 continue
-            delay = step.get(CONF_STEP_DELAY_AFTER, 0)
-            if entity_id not in entity_delays:
-                entity_order.append(entity_id)
-                entity_delays[entity_id] = delay
+
+            _LOGGER.info(
+                "Reconciled room '%s': %s -> %s (score %.2f)",
+                rid,
+                current,
+                adopted,
+                score,
+            )
+            self.interrupted_runs.pop(rid, None)
+            self.room_entities[rid] = on
+            if adopted is not None:
+                step_count = room_plan.activities[adopted].step_count
+                self.active_activities[rid] = adopted
+                self.activity_states[rid] = ACTIVITY_STATE_ACTIVE
+                self.activity_progress[rid] = (step_count, step_count)
             else:
-                entity_delays[entity_id] = max(entity_delays[entity_id], delay)
+                self.active_activities.pop(rid, None)
+                self.activity_states[rid] = ACTIVITY_STATE_IDLE
+                self.activity_progress.pop(rid, None)
+            self._async_publish_state(rid)
+        return results
 
-        shutdown_sequence = [(eid, entity_delays[eid]) for eid in entity_order]
-        for entity_id, delay_after in reversed(shutdown_sequence):
-            try:
-                await self._turn_off_device(entity_id)
-            except Exception as ex:
-                _LOGGER.error("Error turning off %s: %s", entity_id, ex)
-            if delay_after > 0:
+    async def async_start_activity(
+        self, room_id: str, activity_name: str
+    ) -> RunReport:
+        """Start an activity in a room and return the timing report."""
+        report = RunReport(room_id, "start", activity_name)
+        await self._async_run_exclusive(
+            room_id,
+            report,
+            lambda: self._async_start_activity_locked(room_id, activity_name, report),
+        )
+        return report
+
+    async def _async_run_exclusive(
+        self,
+        room_id: str,
+        report: RunReport,
+        run: Callable[[], Coroutine[Any, Any, None]],
+    ) -> None:
+        """Run a transition for a room, preempting the one in flight.
+
+        A running start/stop of the same room is cancelled at its next await —
+        between steps or in the middle of a delay — and the new transition
+        starts from the devices that are actually on.  Requests still waiting
+        for the room are coalesced: only the newest one runs, so a burst
+        A→B→C→D becomes a single A→D transition.
+        """
+        request = self._room_requests.get(room_id, 0) + 1
+        self._room_requests[room_id] = request
+
+        running = self._room_tasks.get(room_id)
+        if running is not None and not running.done():
+            _LOGGER.info("Cancelling running transition in room '%s'", room_id)
+            running.cancel()
+
+        lock = self._room_locks.setdefault(room_id, asyncio.Lock())
+        async with lock:
+            if self._room_requests[room_id] != request:
                 _LOGGER.debug(
-                    "Waiting %s s after turning off %s", delay_after, entity_id
+                    "Dropping request for room '%s', superseded by a newer one",
+                    room_id,
                 )
-                await asyncio.sleep(delay_after)
+                report.finish(RUN_STATUS_SUPERSEDED)
+                return
+            task = self.hass.async_create_task(run(), f"{DOMAIN} transition {room_id}")
+            self._room_tasks[room_id] = task
+            try:
+                await asyncio.wait([task])
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                if self._room_tasks.get(room_id) is task:
+                    del self._room_tasks[room_id]
 
-        del self.active_activities[room_id]
-        self.activity_states[room_id] = ACTIVITY_STATE_IDLE
-        self.activity_progress.pop(room_id, None)
-        self.async_update_listeners()
+        if task.cancelled():
+            _LOGGER.info("Transition in room '%s' was superseded", room_id)
+            report.finish(RUN_STATUS_SUPERSEDED)
+            return
+        task.result()
+        if report.status == RUN_STATUS_RUNNING:
+            report.finish(RUN_STATUS_COMPLETED)
 
-        _LOGGER.info("Activity '%s' stopped in room '%s'", activity_name, room_id)
+    def _current_plan(self, room_id: str) -> ActivityPlan | None:
+        """Return the plan of the active (or last interrupted) activity."""
+        activity_name = self.active_activities.get(room_id)
+        if activity_name is None and room_id in self.interrupted_runs:
+            activity_name = self.interrupted_runs[room_id][0]
+        if activity_name is None:
+            return None
+        return self.get_activity_plan(room_id, activity_name)
 
-    async def _turn_off_device(self, entity_id: str) -> None:
-        """Turn off a device."""
-        domain = entity_id.split(".")[0]
-        if domain == "cover":
-            await self.hass.services.async_call(
-                domain,
-                "close_cover",
-                {ATTR_ENTITY_ID: entity_id},
-                blocking=False,
-            )
-        else:
-            await self.hass.services.async_call(
-                "homeassistant",
-                SERVICE_TURN_OFF,
-                {ATTR_ENTITY_ID: entity_id},
-                blocking=False,
-            )
+    def _shutdown_stages(
+        self, room_id: str, entities: set[str] | frozenset[str]
+    ) -> tuple[ShutdownStage, ...]:
+        """Plan turning off some of the room's devices."""
+        plan = self._current_plan(room_id)
+        if plan is not None:
+            return plan.shutdown_stages(entities)
+        return plan_shutdown(entities, {}, (), 0)
 
-    async def _execute_step(
-        self, step_type: str, entity_id: str, parameters: dict[str, Any]
+    def _record_interruption(self, room_id: str, activity_name: str) -> None:
+        """Remember where a cancelled run stopped."""
+        step, total = self.activity_progress.get(room_id, (0, 0))
+        self.interrupted_runs[room_id] = (activity_name, step, total)
+        self.starting_activities.pop(room_id, None)
+        self.active_activities.pop(room_id, None)
+        self.activity_states[room_id] = ACTIVITY_STATE_IDLE
+        self._async_publish_state(room_id)
+        _LOGGER.info(
+            "Run of '%s' in room '%s' interrupted at step %d/%d; devices on: %s",
+            activity_name,
+            room_id,
+            step,
+            total,
+            sorted(self.room_entities.get(room_id, ())),
+        )
+
+    async def _async_start_activity_locked(
+        self, room_id: str, activity_name: str, report: RunReport
     ) -> None:
-        """Execute a single step using the dispatch table."""
-        if step_type == STEP_TYPE_DELAY:
-            # Pure delay step: no device action — delay_after provides the wait
+        """Start an activity in a room (must be called with room lock held)."""
+        _LOGGER.info("Starting activity '%s' in room '%s'", activity_name, room_id)
+
+        if room_id not in self.plans:
+            _LOGGER.error("Room '%s' not found", room_id)
+            report.finish(RUN_STATUS_FAILED, f"Room '{room_id}' not found")
             return
 
-        handler = self._step_dispatch.get(step_type)
-        if handler is None:
-            _LOGGER.warning("Unknown step type: %s", step_type)
+        plan = self.get_activity_plan(room_id, activity_name)
+        if plan is None:
+            _LOGGER.error("Activity '%s' not found in room '%s'", activity_name, room_id)
+            report.finish(RUN_STATUS_FAILED, f"Activity '{activity_name}' not found")
             return
 
+        if not plan.steps:
+            _LOGGER.warning("Activity '%s' has no steps configured", activity_name)
+            return
+
+        old_plan = self._current_plan(room_id)
         try:
-            # power_on / power_off only need entity_id; all others need parameters too
-            if step_type in (STEP_TYPE_POWER_ON, STEP_TYPE_POWER_OFF):
-                await handler(entity_id)
-            elif step_type == STEP_TYPE_CALL_ACTION:
-                await handler(parameters)
+            # Smart switching: turn off devices that are no longer needed.
+            # The diff is computed against the devices that are actually on,
+            # which after an interrupted run is only part of an activity.
+            current = self.room_entities.setdefault(room_id, set())
+            if old_plan is not None and old_plan.name != activity_name:
+                _LOGGER.info("Switching from '%s' to '%s'", old_plan.name, activity_name)
+
+            # A room that fully runs another activity uses the precomputed
+            # transition; after an interrupted run (or a reconciled partial
+            # device set) the diff is computed against the devices that are
+            # actually on.  Either way every step keeps its live target check.
+            transition = (
+                self.plans[room_id].transitions.get((old_plan.name, activity_name))
+                if old_plan is not None
+                and old_plan.name != activity_name
+                and current == old_plan.entities
+                else None
+            )
+            if transition is not None:
+                kept_on = transition.kept_on
+                unused = set(transition.turn_off)
+                if transition.reapply:
+                    _LOGGER.debug(
+                        "Steps with settings that differ from '%s': %s",
+                        old_plan.name,
+                        sorted(transition.reapply),
+                    )
             else:
-                await handler(entity_id, parameters)
-        except Exception as ex:
-            _LOGGER.error("Error executing step %s on %s: %s", step_type, entity_id, ex)
+                kept_on = frozenset(current & plan.entities)
+                unused = current - plan.entities
+            # Devices another room keeps warm count as carried over, too
+            kept_on |= self._shared_entities(room_id, plan.entities)
+
+            entities_to_turn_off = self._release_shared(room_id, unused)
+            if entities_to_turn_off:
+                _LOGGER.info(
+                    "Turning off devices no longer needed: %s", entities_to_turn_off
+                )
+                await self._async_shutdown(
+                    room_id,
+                    transition.shutdown
+                    if transition is not None
+                    and entities_to_turn_off == transition.turn_off
+                    else self._shutdown_stages(room_id, entities_to_turn_off),
+                    report,
+                )
+
+            self.interrupted_runs.pop(room_id, None)
+            self.starting_activities[room_id] = activity_name
+            self.activity_states[room_id] = ACTIVITY_STATE_STARTING
+            self.activity_progress[room_id] = (0, plan.step_count)
+            self._async_publish_state(room_id)
+
+            await self._async_run_steps(room_id, plan, kept_on, report)
+        except asyncio.CancelledError:
+            if room_id in self.starting_activities:
+                self._record_interruption(room_id, activity_name)
+            elif old_plan is not None:
+                # Cancelled while turning off the old activity's devices: the
+                # devices left on still belong to the old activity
+                self._record_interruption(room_id, old_plan.name)
             raise
 
-    async def _step_power_on(self, entity_id: str) -> None:
-        """Turn on a device."""
-        domain = entity_id.split(".")[0]
-        if domain == "cover":
-            await self.hass.services.async_call(
-                domain, "open_cover", {ATTR_ENTITY_ID: entity_id}, blocking=False
-            )
-        else:
-            await self.hass.services.async_call(
-                "homeassistant", SERVICE_TURN_ON, {ATTR_ENTITY_ID: entity_id}, blocking=False
+        self.room_entities[room_id] = set(plan.entities)
+        self.starting_activities.pop(room_id, None)
+        self.active_activities[room_id] = activity_name
+        self.activity_states[room_id] = ACTIVITY_STATE_ACTIVE
+        self.activity_progress[room_id] = (plan.step_count, plan.step_count)
+        self._async_publish_state(room_id)
+
+        _LOGGER.info(
+            "Activity '%s' started successfully in room '%s'", activity_name, room_id
+        )
+
+    async def _async_run_steps(
+        self,
+        room_id: str,
+        plan: ActivityPlan,
+        kept_on: frozenset[str],
+        report: RunReport,
+    ) -> None:
+        """Run the steps of an activity, honouring its timelines.
+
+        Steps sharing a timeline (a group, or the entity in per-entity mode;
+        ungrouped steps form the default timeline) run in list order, including
+        their ``delay_after``.  Different timelines run concurrently.  A step
+        with prerequisites additionally waits until those steps have finished.
+        Activities without groups therefore run strictly in order.
+
+        ``kept_on`` holds the devices carried over from the previous activity;
+        their power-on steps are skipped when they are still running.
+        """
+        total = plan.step_count
+        finished = {idx: asyncio.Event() for step in plan.steps for idx in step.indices}
+        started = 0
+
+        async def run_timeline(timeline: tuple[StepPlan, ...]) -> None:
+            nonlocal started
+            for step in timeline:
+                for needed in step.prerequisites:
+                    await finished[needed].wait()
+
+                started += len(step.indices)
+                self.activity_progress[room_id] = (started, total)
+                self.room_entities[room_id].update(step.entity_ids)
+                self._async_sync_ownership(room_id)
+                self._async_schedule_save()
+                await self._progress_debouncer(room_id).async_call()
+
+                report.steps.append(
+                    await self._async_run_step(step, total, kept_on)
+                )
+                for idx in step.indices:
+                    finished[idx].set()
+
+        if len(plan.timelines) > 1:
+            _LOGGER.debug(
+                "Running %d step timelines in parallel: %s",
+                len(plan.timelines),
+                [timeline[0].timeline for timeline in plan.timelines],
             )
+        await asyncio.gather(*(run_timeline(timeline) for timeline in plan.timelines))
 
-    async def _step_set_source(self, entity_id: str, parameters: dict[str, Any]) -> None:
-        """Set input source on media player."""
-        source = parameters.get(CONF_INPUT_SOURCE)
-        if source:
-            await self.hass.services.async_call(
-                "media_player",
-                "select_source",
-                {ATTR_ENTITY_ID: entity_id, "source": source},
-                blocking=False,
+    async def _async_run_step(
+        self,
+        step: StepPlan,
+        total: int,
+        kept_on: frozenset[str],
+    ) -> StepReport:
+        """Execute one step and wait its delay_after (or readiness condition)."""
+        result = StepReport(
+            step.index, step.step_type, step.entity_ids, indices=step.indices
+        )
+        targets = [
+            entity_id
+            for entity_id in step.entity_ids
+            if not self._is_step_noop(step, entity_id, kept_on)
+        ]
+        if step.entity_ids and not targets:
+            # The delay belongs to the skipped command, so it is skipped as well
+            _LOGGER.info(
+                "Skipping step %d/%d: %s on %s is already at its target",
+                step.index,
+                total,
+                step.step_type,
+                ", ".join(step.entity_ids),
             )
-            _LOGGER.info("Set source to '%s' on %s", source, entity_id)
-
-    async def _step_set_volume(self, entity_id: str, parameters: dict[str, Any]) -> None:
-        """Set volume on media player."""
-        volume_level = parameters.get(CONF_VOLUME_LEVEL)
-        if volume_level is not None:
-            await self.hass.services.async_call(
-                "media_player",
-                "volume_set",
-                {ATTR_ENTITY_ID: entity_id, "volume_level": volume_level},
-                blocking=False,
+            result.status = STEP_STATUS_SKIPPED
+            return result
+
+        _LOGGER.info(
+            "Executing step %d/%d: %s on %s",
+            step.index,
+            total,
+            step.step_type,
+            ", ".join(targets) or "-",
+        )
+
+        if step.call is not None:
+            # Continue with next step even if this one fails
+            sent = time.monotonic()
+            result.status, result.attempts = await self._async_send_step(
+                step, targets
             )
-            _LOGGER.info("Set volume to %d%% on %s", int(volume_level * 100), entity_id)
+            result.latency = time.monotonic() - sent
+            if result.status == STEP_STATUS_OK:
+                self._async_measure_warmup(step, targets, sent)
 
-    async def _step_set_sound_mode(
-        self, entity_id: str, parameters: dict[str, Any]
-    ) -> None:
-        """Set sound mode on media player."""
-        sound_mode = parameters.get(CONF_SOUND_MODE)
-        if sound_mode:
-            await self.hass.services.async_call(
-                "media_player",
-                "select_sound_mode",
-                {ATTR_ENTITY_ID: entity_id, "sound_mode": sound_mode},
-                blocking=False,
+        waited = time.monotonic()
+        if step.ready is not None:
+            entity_id = step.entity_ids[0]
+            timeout = step.delay_after if step.delay_after > 0 else DEFAULT_WAIT_TIMEOUT
+            _LOGGER.debug(
+                "Waiting up to %s seconds for %s to become ready after step %d",
+                timeout,
+                entity_id,
+                step.index,
             )
-            _LOGGER.info("Set sound mode to '%s' on %s", sound_mode, entity_id)
+            if not await self._async_wait_for_state(entity_id, step.ready, timeout):
+                _LOGGER.warning(
+                    "%s did not become ready within %s seconds", entity_id, timeout
+                )
+                if result.status == STEP_STATUS_OK:
+                    result.status = STEP_STATUS_NOT_READY
+        elif step.delay_after > 0:
+            delay = self._step_delay(step, targets)
+            _LOGGER.debug("Waiting %s seconds after step %d", delay, step.index)
+            await asyncio.sleep(delay)
+        result.wait = time.monotonic() - waited
+        return result
+
+    def _step_delay(self, step: StepPlan, targets: list[str]) -> float:
+        """Return the delay after a step, learned when the activity opts in.
 
-    async def _step_set_brightness(
-        self, entity_id: str, parameters: dict[str, Any]
+        The learned delay is the p95 warm-up time of the slowest target; it
+        is only used once every target has enough samples.  It is capped at
+        DEFAULT_WAIT_TIMEOUT, or at the configured delay if that is longer.
+        """
+        if not step.adaptive:
+            return step.delay_after
+        learned = [self.warmup.learned_delay(entity_id) for entity_id in targets]
+        if not learned or None in learned:
+            return step.delay_after
+        delay = min(max(learned), max(step.delay_after, DEFAULT_WAIT_TIMEOUT))
+        _LOGGER.debug(
+            "Using learned warm-up time %.2f s instead of %s s for step %d",
+            delay,
+            step.delay_after,
+            step.index,
+        )
+        return delay
+
+    @callback
+    def _async_measure_warmup(
+        self, step: StepPlan, targets: list[str], sent: float
     ) -> None:
-        """Set brightness and optional color/transition on light."""
-        service_data: dict[str, Any] = {ATTR_ENTITY_ID: entity_id}
+        """Measure how long the powered-on devices take to become ready.
 
-        for param, key in (
-            (CONF_BRIGHTNESS, "brightness"),
-            (CONF_COLOR_TEMP, "color_temp"),
-            (CONF_TRANSITION, "transition"),
+        Only power-on steps that are followed by a delay or readiness wait are
+        measured; the measurement runs in the background and never delays the
+        activity.  A device that is not ready within the bound (at least the
+        configured delay) is recorded at the bound, so slow starts are not
+        dropped from the samples.
+        """
+        predicate = step.ready or step.verify
+        if (
+            step.step_type != STEP_TYPE_POWER_ON
+            or predicate is None
+            or (step.delay_after <= 0 and step.ready is None)
         ):
-            value = parameters.get(param)
-            if value is not None:
-                service_data[key] = value
+            return
 
-        if len(service_data) > 1:
-            await self.hass.services.async_call(
-                "light", SERVICE_TURN_ON, service_data, blocking=False
-            )
-            _LOGGER.info("Set light settings on %s", entity_id)
+        bound = max(step.delay_after, DEFAULT_WAIT_TIMEOUT)
 
-    async def _step_set_color_temp(
-        self, entity_id: str, parameters: dict[str, Any]
-    ) -> None:
-        """Set color temperature on light."""
-        color_temp = parameters.get(CONF_COLOR_TEMP)
-        if color_temp is not None:
-            await self.hass.services.async_call(
-                "light",
-                SERVICE_TURN_ON,
-                {ATTR_ENTITY_ID: entity_id, "color_temp": color_temp},
-                blocking=False,
+        async def measure(entity_id: str) -> None:
+            if await self._async_wait_for_state(entity_id, predicate, bound):
+                self.warmup.async_record(entity_id, time.monotonic() - sent)
+            else:
+                self.warmup.async_record(entity_id, bound)
+
+        for entity_id in targets:
+            self.hass.async_create_task(
+                measure(entity_id), f"{DOMAIN} warm-up {entity_id}"
             )
-            _LOGGER.info("Set color temp to %s on %s", color_temp, entity_id)
 
-    async def _step_set_position(
-        self, entity_id: str, parameters: dict[str, Any]
-    ) -> None:
-        """Set position on cover."""
-        position = parameters.get(CONF_POSITION)
-        if position is not None:
-            await self.hass.services.async_call(
-                "cover",
-                "set_cover_position",
-                {ATTR_ENTITY_ID: entity_id, "position": position},
-                blocking=False,
+    @staticmethod
+    def _step_call(step: StepPlan, targets: list[str]) -> ServiceCallPlan:
+        """Return the step's call, narrowed to the given entities."""
+        call = step.call
+        assert call is not None
+        if len(targets) == len(step.entity_ids):
+            return call
+        # Only send the batched call to entities that still need it
+        return ServiceCallPlan(
+            call.domain,
+            call.service,
+            ReadOnlyDict({**call.service_data, ATTR_ENTITY_ID: targets}),
+        )
+
+    async def _async_send_step(
+        self, step: StepPlan, targets: list[str]
+    ) -> tuple[str, int]:
+        """Send a step's call, retrying until it is confirmed.
+
+        Steps with ``retries`` are checked against their verification
+        predicate (device on/off, or the target source, volume or sound mode)
+        via state events.  Only the entities that did not confirm are sent the
+        call again, after an exponentially growing backoff.  Returns the final
+        status and the number of attempts.
+        """
+        attempt = 1
+        while True:
+            status = await self._async_call(
+                self._step_call(step, targets), tuple(targets), step.call_timeout
             )
-            _LOGGER.info("Set cover position to %d%% on %s", position, entity_id)
-
-    async def _step_set_tilt(self, entity_id: str, parameters: dict[str, Any]) -> None:
-        """Set tilt on cover."""
-        tilt = parameters.get(CONF_TILT_POSITION)
-        if tilt is not None:
-            await self.hass.services.async_call(
-                "cover",
-                "set_cover_tilt_position",
-                {ATTR_ENTITY_ID: entity_id, "tilt_position": tilt},
-                blocking=False,
+            if status == STEP_STATUS_OK and step.retries and step.verify is not None:
+                confirmed = await asyncio.gather(
+                    *(
+                        self._async_wait_for_state(
+                            entity_id, step.verify, self._verify_timeout(step)
+                        )
+                        for entity_id in targets
+                    )
+                )
+                targets = [
+                    entity_id
+                    for entity_id, ok in zip(targets, confirmed)
+                    if not ok
+                ]
+                if targets:
+                    status = STEP_STATUS_UNVERIFIED
+
+            if status == STEP_STATUS_OK or attempt > step.retries:
+                if status == STEP_STATUS_UNVERIFIED:
+                    _LOGGER.warning(
+                        "Step %d (%s) not confirmed by %s after %d attempts",
+                        step.index,
+                        step.step_type,
+                        ", ".join(targets),
+                        attempt,
+                    )
+                return status, attempt
+
+            backoff = RETRY_BACKOFF * 2 ** (attempt - 1)
+            _LOGGER.info(
+                "Step %d (%s) %s for %s, retrying in %s seconds",
+                step.index,
+                step.step_type,
+                status,
+                ", ".join(targets) or "-",
+                backoff,
             )
-            _LOGGER.info("Set cover tilt to %d%% on %s", tilt, entity_id)
+            await asyncio.sleep(backoff)
+            attempt += 1
 
-    async def _step_call_action(self, parameters: dict[str, Any]) -> None:
-        """Call a Home Assistant action/service."""
-        action = parameters.get(CONF_ACTION)
-        if not action:
-            _LOGGER.error("No action specified for call_action step")
-            return
+    @staticmethod
+    def _verify_timeout(step: StepPlan) -> float:
+        """Return how long a device may take to confirm a step.
 
+        Devices can take much longer than VERIFY_TIMEOUT to report on or off
+        (a projector warming up); re-sending a power command too early toggles
+        IR/CEC devices back, so power steps get their delay_after or readiness
+        timeout as the window.
+        """
+        if step.step_type not in (STEP_TYPE_POWER_ON, STEP_TYPE_POWER_OFF):
+            return VERIFY_TIMEOUT
+        if step.delay_after > 0:
+            return max(step.delay_after, VERIFY_TIMEOUT)
+        if step.ready is not None:
+            return DEFAULT_WAIT_TIMEOUT
+        return VERIFY_TIMEOUT
+
+    async def _async_call(
+        self,
+        call: ServiceCallPlan,
+        entity_ids: tuple[str, ...],
+        timeout: float | None = None,
+    ) -> str:
+        """Send a compiled service call and return the step status.
+
+        With a ``timeout`` the call is blocking: it only counts as successful
+        once the target integration has processed it, and a call that takes
+        longer than ``timeout`` seconds is a failure.  Errors are logged, not
+        raised.
+        """
+        targets = ", ".join(entity_ids) or "-"
         try:
-            domain, service = action.split(".", 1)
-        except ValueError:
+            if timeout is None:
+                await self.hass.services.async_call(
+                    call.domain, call.service, call.service_data, blocking=False
+                )
+            else:
+                await asyncio.wait_for(
+                    self.hass.services.async_call(
+                        call.domain, call.service, call.service_data, blocking=True
+                    ),
+                    timeout,
+                )
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "%s.%s for %s did not complete within %s seconds",
+                call.domain,
+                call.service,
+                targets,
+                timeout,
+            )
+            return STEP_STATUS_TIMEOUT
+        except Exception as ex:
             _LOGGER.error(
-                "Invalid action format: '%s'. Expected format: domain.service", action
+                "Error calling %s.%s for %s: %s", call.domain, call.service, targets, ex
             )
+            return STEP_STATUS_FAILED
+        _LOGGER.debug("Called %s.%s for %s", call.domain, call.service, targets)
+        return STEP_STATUS_OK
+
+    async def _async_wait_for_state(
+        self,
+        entity_id: str,
+        predicate: Callable[[State | None], bool],
+        timeout: float,
+    ) -> bool:
+        """Wait until the entity's state satisfies predicate, or time out.
+
+        Uses a state-change subscription instead of polling, so the wait is
+        released on the event that makes the predicate true.
+        """
+        if predicate(self.hass.states.get(entity_id)):
+            return True
+
+        ready: asyncio.Future[bool] = self.hass.loop.create_future()
+
+        @callback
+        def _async_state_changed(event: Event) -> None:
+            if not ready.done() and predicate(event.data.get("new_state")):
+                ready.set_result(True)
+
+        unsub = async_track_state_change_event(
+            self.hass, [entity_id], _async_state_changed
+        )
+        try:
+            return await asyncio.wait_for(ready, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            unsub()
+
+    def _is_step_noop(
+        self, step: StepPlan, entity_id: str, kept_on: frozenset[str]
+    ) -> bool:
+        """Return True if the step would not change the entity's live state."""
+        if step.step_type == STEP_TYPE_POWER_ON:
+            return self._is_already_on(entity_id, kept_on)
+
+        if step.target_attribute is None or step.target_value is None:
+            return False
+
+        return target_reached(
+            step.step_type,
+            step.target_attribute,
+            step.target_value,
+            self.hass.states.get(entity_id),
+        )
+
+    def _is_already_on(self, entity_id: str, kept_on: frozenset[str]) -> bool:
+        """Return True if a power-on step for the entity would be a no-op.
+
+        Devices that report an on-like state are running; a cover that is
+        still opening or closing is not.  Devices carried over from the
+        previous activity are assumed to be running unless they explicitly
+        report off, since they were never turned off.
+        """
+        state = self.hass.states.get(entity_id)
+        if is_powered_on(state):
+            return True
+        if entity_id in kept_on:
+            return state is None or state.state == STATE_UNKNOWN
+        return False
+
+    async def async_stop_activity(self, room_id: str) -> RunReport:
+        """Stop the current activity in a room and return the timing report."""
+        report = RunReport(room_id, "stop", self.active_activities.get(room_id))
+        await self._async_run_exclusive(
+            room_id, report, lambda: self._async_stop_activity_locked(room_id, report)
+        )
+        return report
+
+    async def _async_stop_activity_locked(
+        self, room_id: str, report: RunReport
+    ) -> None:
+        """Stop the current activity in a room (must be called with room lock held)."""
+        entities = self.room_entities.get(room_id)
+        if room_id not in self.active_activities and not entities:
+            _LOGGER.debug("No active activity in room '%s'", room_id)
             return
+        if entities:
+            entities = self._release_shared(room_id, set(entities))
+
+        plan = self._current_plan(room_id)
+        activity_name = plan.name if plan is not None else "-"
+        report.activity = plan.name if plan is not None else None
+        _LOGGER.info("Stopping activity '%s' in room '%s'", activity_name, room_id)
+
+        self.activity_states[room_id] = ACTIVITY_STATE_STOPPING
+        self._async_publish_state(room_id)
+
+        try:
+            if plan is not None and entities == plan.entities:
+                await self._async_shutdown(room_id, plan.shutdown, report)
+            elif entities:
+                await self._async_shutdown(
+                    room_id, self._shutdown_stages(room_id, entities), report
+                )
+        except asyncio.CancelledError:
+            self._record_interruption(room_id, activity_name)
+            raise
+
+        self.active_activities.pop(room_id, None)
+        self.interrupted_runs.pop(room_id, None)
+        self.room_entities.pop(room_id, None)
+        self.activity_states[room_id] = ACTIVITY_STATE_IDLE
+        self.activity_progress.pop(room_id, None)
+        self._async_publish_state(room_id)
+
+        _LOGGER.info("Activity '%s' stopped in room '%s'", activity_name, room_id)
+
+    async def _async_shutdown(
+        self, room_id: str, stages: tuple[ShutdownStage, ...], report: RunReport
+    ) -> None:
+        """Run shutdown stages; the calls of a stage are sent concurrently.
+
+        Each turn-off call is added to ``report`` with index 0.
+        """
+        for stage in stages:
+            results = await asyncio.gather(
+                *(
+                    self._async_timed_call(call, entity_ids, stage.call_timeout)
+                    for entity_ids, call in stage.calls
+                )
+            )
+            for entity_ids, _ in stage.calls:
+                self.room_entities.get(room_id, set()).difference_update(entity_ids)
+            self._async_sync_ownership(room_id)
+            report.steps.extend(results)
+            if stage.delay_after > 0:
+                _LOGGER.debug("Waiting %s s before next shutdown stage", stage.delay_after)
+                await asyncio.sleep(stage.delay_after)
+                for result in results:
+                    result.wait = stage.delay_after
 
-        service_data = parameters.get(CONF_SERVICE_DATA, {})
-        _LOGGER.info("Calling action '%s' with data: %s", action, service_data)
-        await self.hass.services.async_call(domain, service, service_data, blocking=False)
-        _LOGGER.info("Dispatched action '%s'", action)
+    async def _async_timed_call(
+        self,
+        call: ServiceCallPlan,
+        entity_ids: tuple[str, ...],
+        timeout: float | None,
+    ) -> StepReport:
+        """Send a turn-off call and report its latency."""
+        result = StepReport(0, "turn_off", entity_ids)
+        sent = time.monotonic()
+        result.status = await self._async_call(call, entity_ids, timeout)
+        result.latency = time.monotonic() - sent
+        return result
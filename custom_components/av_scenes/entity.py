@@ -0,0 +1,29 @@
+"""Base entity for AV Scenes room entities."""
+from __future__ import annotations
+
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import AVScenesCoordinator
+
+
+class AVScenesRoomEntity(CoordinatorEntity[AVScenesCoordinator]):
+    """Entity bound to one room of the coordinator.
+
+    Besides coordinator refreshes (config reloads), the entity only reacts to
+    changes of its own room, so a running activity in one room does not
+    rewrite the entities of every other room.
+    """
+
+    def __init__(self, coordinator: AVScenesCoordinator, room_id: str) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self.room_id = room_id
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to updates of this room."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_room_listener(
+                self.room_id, self._handle_coordinator_update
+            )
+        )
@@ -0,0 +1,87 @@
+"""Background runs of AV Scenes services ("wait: false")."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_JOB_TRACKER, DOMAIN, EVENT_JOB_FINISHED
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of finished job results kept for wait_for_job
+_MAX_FINISHED_JOBS = 100
+
+
+class JobTracker:
+    """Run service calls in the background and keep their results.
+
+    A job is identified by an opaque id.  When it finishes, its response is
+    stored (the last ``_MAX_FINISHED_JOBS`` are kept) and an
+    ``av_scenes_job_finished`` event carrying the response is fired.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self._running: dict[str, asyncio.Task[dict[str, Any]]] = {}
+        self._finished: dict[str, dict[str, Any]] = {}
+
+    @callback
+    def async_submit(self, job: Callable[[], Awaitable[dict[str, Any]]]) -> str:
+        """Schedule a job and return its id immediately."""
+        job_id = uuid4().hex
+        task = self.hass.async_create_task(job(), f"{DOMAIN} job {job_id}")
+        self._running[job_id] = task
+        task.add_done_callback(lambda task: self._async_finished(job_id, task))
+        return job_id
+
+    @callback
+    def _async_finished(self, job_id: str, task: asyncio.Task[dict[str, Any]]) -> None:
+        """Store the result of a finished job and announce it."""
+        self._running.pop(job_id, None)
+        if task.cancelled():
+            result: dict[str, Any] = {"status": "cancelled"}
+        elif (ex := task.exception()) is not None:
+            _LOGGER.error("Job %s failed: %s", job_id, ex, exc_info=ex)
+            result = {"status": "failed", "error": str(ex)}
+        else:
+            result = task.result()
+
+        self._finished[job_id] = result
+        while len(self._finished) > _MAX_FINISHED_JOBS:
+            del self._finished[next(iter(self._finished))]
+
+        self.hass.bus.async_fire(EVENT_JOB_FINISHED, {"job_id": job_id, **result})
+
+    async def async_wait(self, job_id: str, timeout: float | None) -> dict[str, Any]:
+        """Wait for a job and return its result (or its current status)."""
+        if job_id in self._finished:
+            return {"job_id": job_id, **self._finished[job_id]}
+
+        task = self._running.get(job_id)
+        if task is None:
+            return {"job_id": job_id, "status": "unknown"}
+
+        await asyncio.wait([task], timeout=timeout)
+        if job_id not in self._finished:
+            return {"job_id": job_id, "status": "running"}
+        return {"job_id": job_id, **self._finished[job_id]}
+
+    @callback
+    def async_cancel_all(self) -> None:
+        """Cancel all running jobs (last entry unloaded)."""
+        for task in self._running.values():
+            task.cancel()
+
+
+@callback
+def async_get_job_tracker(hass: HomeAssistant) -> JobTracker:
+    """Return the job tracker of the domain, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_JOB_TRACKER not in domain_data:
+        domain_data[DATA_JOB_TRACKER] = JobTracker(hass)
+    return domain_data[DATA_JOB_TRACKER]
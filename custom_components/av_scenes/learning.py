@@ -0,0 +1,83 @@
+"""Learned device warm-up times for AV Scenes."""
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_WARMUP, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.warmup"
+
+# Samples kept per entity (rolling window)
+_MAX_SAMPLES = 20
+# Samples required before a learned delay is used
+MIN_SAMPLES = 5
+# Percentile used as the learned delay
+_PERCENTILE = 0.95
+_SAVE_DELAY = 30
+
+
+class WarmupLearner:
+    """Rolling per-entity samples of the time from power-on to ready.
+
+    Samples are persisted with the storage helper (writes are delayed and
+    coalesced), so learned delays survive restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the learner."""
+        self._store: Store[dict[str, list[float]]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY
+        )
+        self._samples: dict[str, list[float]] = {}
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Load persisted samples (once)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        data = await self._store.async_load()
+        if data:
+            self._samples = {
+                entity_id: [float(sample) for sample in samples][-_MAX_SAMPLES:]
+                for entity_id, samples in data.items()
+            }
+
+    @callback
+    def async_record(self, entity_id: str, seconds: float) -> None:
+        """Add a warm-up measurement of an entity."""
+        samples = self._samples.setdefault(entity_id, [])
+        samples.append(round(seconds, 2))
+        del samples[:-_MAX_SAMPLES]
+        _LOGGER.debug("Warm-up of %s took %.2f s", entity_id, seconds)
+        self._store.async_delay_save(self._data_to_save, _SAVE_DELAY)
+
+    def learned_delay(self, entity_id: str) -> float | None:
+        """Return the p95 warm-up time, or None while there are too few samples."""
+        samples = self._samples.get(entity_id)
+        if not samples or len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[math.ceil(_PERCENTILE * len(ordered)) - 1]
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return self._samples
+
+
+@callback
+def async_get_warmup_learner(hass: HomeAssistant) -> WarmupLearner:
+    """Return the warm-up learner of the domain, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_WARMUP not in domain_data:
+        domain_data[DATA_WARMUP] = WarmupLearner(hass)
+    return domain_data[DATA_WARMUP]
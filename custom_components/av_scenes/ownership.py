@@ -0,0 +1,67 @@
+"""Domain-wide ownership of shared AV devices."""
+from __future__ import annotations
+
+from typing import Iterable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_OWNERSHIP, DOMAIN
+
+# (entry_id, room_id)
+Owner = tuple[str, str]
+
+
+class DeviceOwnership:
+    """Reference counts of the devices kept on by the rooms of all entries.
+
+    A room owns the devices it has switched on while one of its activities is
+    starting or active.  A device owned by several rooms (a receiver shared
+    by two rooms, possibly of different config entries) is only turned off
+    when its last owner releases it, and is not powered on again by a room
+    that starts while another one keeps it warm.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty ownership table."""
+        # entity_id -> owners; the reference count is the number of owners
+        self._owners: dict[str, set[Owner]] = {}
+        self._entities: dict[Owner, frozenset[str]] = {}
+
+    @callback
+    def async_set(self, owner: Owner, entities: Iterable[str]) -> None:
+        """Replace the devices owned by a room."""
+        old = self._entities.pop(owner, frozenset())
+        new = frozenset(entities)
+        for entity_id in old - new:
+            owners = self._owners[entity_id]
+            owners.discard(owner)
+            if not owners:
+                del self._owners[entity_id]
+        for entity_id in new - old:
+            self._owners.setdefault(entity_id, set()).add(owner)
+        if new:
+            self._entities[owner] = new
+
+    @callback
+    def async_release_entry(self, entry_id: str) -> None:
+        """Release all devices owned by the rooms of a config entry."""
+        for owner in [owner for owner in self._entities if owner[0] == entry_id]:
+            self.async_set(owner, ())
+
+    def ref_count(self, entity_id: str) -> int:
+        """Return the number of rooms owning a device."""
+        return len(self._owners.get(entity_id, ()))
+
+    def in_use_elsewhere(self, owner: Owner, entity_id: str) -> bool:
+        """Return True if a room other than ``owner`` owns the device."""
+        owners = self._owners.get(entity_id)
+        return bool(owners) and (len(owners) > 1 or owner not in owners)
+
+
+@callback
+def async_get_device_ownership(hass: HomeAssistant) -> DeviceOwnership:
+    """Return the device ownership table of the domain, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_OWNERSHIP not in domain_data:
+        domain_data[DATA_OWNERSHIP] = DeviceOwnership()
+    return domain_data[DATA_OWNERSHIP]
@@ -0,0 +1,752 @@
+"""Compiled execution plans for AV Scenes activities.
+
+Activities are stored as plain config dicts in the config entry.  Walking
+those dicts on every start means repeated ``.get()`` lookups, entity-ID
+splitting and payload construction.  This module compiles each activity once
+(when the coordinator loads its config) into immutable, slotted plan objects
+with the service domain, service and payload already resolved, so the
+coordinator only has to iterate the plan.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import partial
+import logging
+from typing import Any, Callable, Iterable
+
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    SERVICE_TURN_OFF,
+    SERVICE_TURN_ON,
+    STATE_CLOSED,
+    STATE_CLOSING,
+    STATE_OFF,
+    STATE_OPENING,
+    STATE_STANDBY,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+)
+from homeassistant.core import State
+from homeassistant.util.read_only_dict import ReadOnlyDict
+
+from .const import (
+    CONF_ACTIVITIES,
+    CONF_STEPS,
+    CONF_STEP_TYPE,
+    CONF_STEP_DELAY_AFTER,
+    CONF_STEP_PARAMETERS,
+    CONF_STEP_GROUP,
+    CONF_STEP_DEPENDS_ON,
+    CONF_STEP_WAIT_STATE,
+    CONF_STEP_WAIT_ATTRIBUTE,
+    CONF_EXECUTION_MODE,
+    CONF_SHUTDOWN_ORDER,
+    CONF_SHUTDOWN_DELAY,
+    CONF_BLOCKING,
+    CONF_CALL_TIMEOUT,
+    CONF_STEP_RETRIES,
+    CONF_ADAPTIVE_DELAYS,
+    CONF_ENFORCE,
+    DEFAULT_CALL_TIMEOUT,
+    EXECUTION_MODE_SEQUENTIAL,
+    EXECUTION_MODE_PER_ENTITY,
+    CONF_ENTITY_ID,
+    CONF_INPUT_SOURCE,
+    CONF_VOLUME_LEVEL,
+    CONF_SOUND_MODE,
+    CONF_BRIGHTNESS,
+    CONF_COLOR_TEMP,
+    CONF_TRANSITION,
+    CONF_POSITION,
+    CONF_TILT_POSITION,
+    CONF_ACTION,
+    CONF_SERVICE_DATA,
+    STEP_TYPE_POWER_ON,
+    STEP_TYPE_POWER_OFF,
+    STEP_TYPE_SET_SOURCE,
+    STEP_TYPE_SET_VOLUME,
+    STEP_TYPE_SET_SOUND_MODE,
+    STEP_TYPE_SET_BRIGHTNESS,
+    STEP_TYPE_SET_COLOR_TEMP,
+    STEP_TYPE_SET_POSITION,
+    STEP_TYPE_SET_TILT,
+    STEP_TYPE_CALL_ACTION,
+    STEP_TYPE_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# States in which a device is considered powered off (or not reachable)
+OFF_STATES = frozenset(
+    {STATE_OFF, STATE_STANDBY, STATE_CLOSED, STATE_UNAVAILABLE, STATE_UNKNOWN}
+)
+
+# States of devices still moving towards on/open or off/closed (covers); a
+# power-on step is not at its target while the device reports one of them
+TRANSITIONAL_STATES = frozenset({STATE_OPENING, STATE_CLOSING})
+
+# Volume levels closer than this are treated as equal (HA reports floats)
+VOLUME_TOLERANCE = 0.005
+
+# Parameterized media player steps: step type -> (parameter, state attribute)
+_ATTRIBUTE_STEPS: dict[str, tuple[str, str]] = {
+    STEP_TYPE_SET_SOURCE: (CONF_INPUT_SOURCE, "source"),
+    STEP_TYPE_SET_VOLUME: (CONF_VOLUME_LEVEL, "volume_level"),
+    STEP_TYPE_SET_SOUND_MODE: (CONF_SOUND_MODE, "sound_mode"),
+}
+
+# Attributes that identify a running activity (volume is changed too often)
+_EXPECTED_ATTRIBUTE_STEPS = frozenset({STEP_TYPE_SET_SOURCE, STEP_TYPE_SET_SOUND_MODE})
+# Steps re-applied by drift enforcement
+_ENFORCED_STEPS = frozenset(_ATTRIBUTE_STEPS)
+
+
+@dataclass(frozen=True, slots=True)
+class ServiceCallPlan:
+    """A fully resolved Home Assistant service call."""
+
+    domain: str
+    service: str
+    service_data: ReadOnlyDict[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class StepPlan:
+    """A single compiled activity step."""
+
+    index: int  # 1-based position in the activity (first step of a batch)
+    indices: tuple[int, ...]  # All configured steps covered by this plan step
+    step_type: str
+    entity_ids: tuple[str, ...]  # Several entities when identical calls are batched
+    call: ServiceCallPlan | None  # None: nothing to send (delay, empty parameters)
+    delay_after: float
+    timeline: str  # Steps sharing a timeline run in order
+    prerequisites: tuple[int, ...]  # Indices of steps that must finish first
+    ready: Callable[[State | None], bool] | None  # Readiness condition, if any
+    target_attribute: str | None  # Attribute compared by the diff check
+    target_value: Any
+    call_timeout: float | None  # Blocking call timeout; None: fire and forget
+    retries: int  # Re-sends allowed when the call fails or is not confirmed
+    verify: Callable[[State | None], bool] | None  # Confirms the step took effect
+    adaptive: bool  # delay_after may be replaced by the learned warm-up time
+
+
+@dataclass(frozen=True, slots=True)
+class ShutdownStage:
+    """Turn-off calls that are sent concurrently, then an optional wait."""
+
+    calls: tuple[tuple[tuple[str, ...], ServiceCallPlan], ...]
+    delay_after: float
+    call_timeout: float | None
+
+
+@dataclass(frozen=True, slots=True)
+class ActivityPlan:
+    """A compiled activity."""
+
+    name: str
+    steps: tuple[StepPlan, ...]
+    step_count: int  # Number of configured steps (batched steps count each)
+    timelines: tuple[tuple[StepPlan, ...], ...]
+    entities: frozenset[str]
+    shutdown: tuple[ShutdownStage, ...]
+    turn_off: ReadOnlyDict[str, ServiceCallPlan]
+    shutdown_order: tuple[str, ...]
+    shutdown_delay: float
+    call_timeout: float | None  # Activity default, also used for turn-off calls
+    # Live state of a running activity: (entity_id, step_type, attribute, value);
+    # attribute None checks the power state (value True: on, False: off)
+    expectations: tuple[tuple[str, str, str | None, Any], ...]
+    # Drift enforcement: entity_id -> source/sound mode/volume steps to keep
+    # applied while the activity is active (empty unless enabled)
+    enforced: ReadOnlyDict[str, tuple[StepPlan, ...]]
+
+    def shutdown_stages(self, entities: Iterable[str]) -> tuple[ShutdownStage, ...]:
+        """Plan the shutdown of a subset of this activity's devices."""
+        return plan_shutdown(
+            entities,
+            self.turn_off,
+            self.shutdown_order,
+            self.shutdown_delay,
+            self.call_timeout,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class TransitionPlan:
+    """A precomputed switch from one activity of a room to another.
+
+    ``reapply`` is informational: every step of the new activity still runs
+    through the live diff check, since devices may have drifted, failed a
+    step or been switched by a remote since the old activity ran.
+    """
+
+    source: str
+    target: str
+    turn_off: frozenset[str]  # Devices of the old activity the new one does not use
+    shutdown: tuple[ShutdownStage, ...]  # Turning them off, in the old order
+    kept_on: frozenset[str]  # Devices both activities use
+    # Parameterized steps whose target differs from the old activity's
+    reapply: frozenset[int]
+
+
+@dataclass(frozen=True, slots=True)
+class RoomPlan:
+    """All compiled activities of a room."""
+
+    room_id: str
+    activities: ReadOnlyDict[str, ActivityPlan]
+    entities: frozenset[str]  # Devices used by any activity of the room
+    # (from_activity, to_activity) -> transition, for every pair
+    transitions: ReadOnlyDict[tuple[str, str], TransitionPlan]
+
+
+def readiness_predicate(
+    wait_state: str | None, wait_attribute: str | None
+) -> Callable[[State | None], bool]:
+    """Build the readiness check configured on a step."""
+
+    def _is_ready(state: State | None) -> bool:
+        if state is None:
+            return False
+        if wait_state and state.state != wait_state:
+            return False
+        if wait_attribute and not state.attributes.get(wait_attribute):
+            return False
+        return True
+
+    return _is_ready
+
+
+def is_powered_on(state: State | None) -> bool:
+    """Return True if a device reports that it is on (or open)."""
+    return (
+        state is not None
+        and state.state not in OFF_STATES
+        and state.state not in TRANSITIONAL_STATES
+    )
+
+
+def target_reached(
+    step_type: str, attribute: str, value: Any, state: State | None
+) -> bool:
+    """Return True if a running device reports the step's target attribute."""
+    if state is None or state.state in OFF_STATES:
+        # Attributes of an off device are stale or missing
+        return False
+
+    current = state.attributes.get(attribute)
+    if current is None:
+        return False
+    if step_type == STEP_TYPE_SET_VOLUME:
+        try:
+            return abs(float(current) - float(value)) < VOLUME_TOLERANCE
+        except (TypeError, ValueError):
+            return False
+    return current == value
+
+
+def verification_predicate(
+    step_type: str, target_attribute: str | None, target_value: Any
+) -> Callable[[State | None], bool] | None:
+    """Build the check confirming that a step took effect, if there is one."""
+    if step_type == STEP_TYPE_POWER_ON:
+        return is_powered_on
+    if step_type == STEP_TYPE_POWER_OFF:
+        return lambda state: state is not None and state.state in OFF_STATES
+    if target_attribute is not None and target_value is not None:
+        return partial(target_reached, step_type, target_attribute, target_value)
+    return None
+
+
+def _entity_call(domain: str, service: str, entity_id: str, **data: Any) -> ServiceCallPlan:
+    """Build a service call targeting a single entity."""
+    return ServiceCallPlan(domain, service, ReadOnlyDict({ATTR_ENTITY_ID: entity_id, **data}))
+
+
+def compile_turn_on(entity_id: str) -> ServiceCallPlan:
+    """Resolve the power-on call for an entity."""
+    if entity_id.split(".", 1)[0] == "cover":
+        return _entity_call("cover", "open_cover", entity_id)
+    return _entity_call("homeassistant", SERVICE_TURN_ON, entity_id)
+
+
+def compile_turn_off(entity_id: str) -> ServiceCallPlan:
+    """Resolve the power-off call for an entity."""
+    if entity_id.split(".", 1)[0] == "cover":
+        return _entity_call("cover", "close_cover", entity_id)
+    return _entity_call("homeassistant", SERVICE_TURN_OFF, entity_id)
+
+
+def _compile_set_source(entity_id: str, parameters: dict[str, Any]) -> ServiceCallPlan | None:
+    source = parameters.get(CONF_INPUT_SOURCE)
+    if not source:
+        return None
+    return _entity_call("media_player", "select_source", entity_id, source=source)
+
+
+def _compile_set_volume(entity_id: str, parameters: dict[str, Any]) -> ServiceCallPlan | None:
+    volume_level = parameters.get(CONF_VOLUME_LEVEL)
+    if volume_level is None:
+        return None
+    return _entity_call("media_player", "volume_set", entity_id, volume_level=volume_level)
+
+
+def _compile_set_sound_mode(
+    entity_id: str, parameters: dict[str, Any]
+) -> ServiceCallPlan | None:
+    sound_mode = parameters.get(CONF_SOUND_MODE)
+    if not sound_mode:
+        return None
+    return _entity_call("media_player", "select_sound_mode", entity_id, sound_mode=sound_mode)
+
+
+def _compile_set_brightness(
+    entity_id: str, parameters: dict[str, Any]
+) -> ServiceCallPlan | None:
+    data = {
+        key: parameters[param]
+        for param, key in (
+            (CONF_BRIGHTNESS, "brightness"),
+            (CONF_COLOR_TEMP, "color_temp"),
+            (CONF_TRANSITION, "transition"),
+        )
+        if parameters.get(param) is not None
+    }
+    if not data:
+        return None
+    return _entity_call("light", SERVICE_TURN_ON, entity_id, **data)
+
+
+def _compile_set_color_temp(
+    entity_id: str, parameters: dict[str, Any]
+) -> ServiceCallPlan | None:
+    color_temp = parameters.get(CONF_COLOR_TEMP)
+    if color_temp is None:
+        return None
+    return _entity_call("light", SERVICE_TURN_ON, entity_id, color_temp=color_temp)
+
+
+def _compile_set_position(
+    entity_id: str, parameters: dict[str, Any]
+) -> ServiceCallPlan | None:
+    position = parameters.get(CONF_POSITION)
+    if position is None:
+        return None
+    return _entity_call("cover", "set_cover_position", entity_id, position=position)
+
+
+def _compile_set_tilt(entity_id: str, parameters: dict[str, Any]) -> ServiceCallPlan | None:
+    tilt = parameters.get(CONF_TILT_POSITION)
+    if tilt is None:
+        return None
+    return _entity_call("cover", "set_cover_tilt_position", entity_id, tilt_position=tilt)
+
+
+def _compile_call_action(
+    entity_id: str, parameters: dict[str, Any]
+) -> ServiceCallPlan | None:
+    action = parameters.get(CONF_ACTION)
+    if not action:
+        _LOGGER.error("No action specified for call_action step")
+        return None
+
+    try:
+        domain, service = action.split(".", 1)
+    except ValueError:
+        _LOGGER.error(
+            "Invalid action format: '%s'. Expected format: domain.service", action
+        )
+        return None
+
+    return ServiceCallPlan(
+        domain, service, ReadOnlyDict(parameters.get(CONF_SERVICE_DATA) or {})
+    )
+
+
+def _payload_without_entities(call: ServiceCallPlan) -> dict[str, Any]:
+    return {k: v for k, v in call.service_data.items() if k != ATTR_ENTITY_ID}
+
+
+def batch_calls(
+    calls: Iterable[tuple[str, ServiceCallPlan]],
+) -> list[tuple[tuple[str, ...], ServiceCallPlan]]:
+    """Merge single-entity calls that only differ in their target entity.
+
+    Returns (entity_ids, call) pairs; calls with identical domain, service and
+    payload are combined into one call with a list of entity IDs.
+    """
+    batches: list[tuple[list[str], ServiceCallPlan, dict[str, Any]]] = []
+    for entity_id, call in calls:
+        payload = _payload_without_entities(call)
+        for entity_ids, batch_call, batch_payload in batches:
+            if (
+                batch_call.domain == call.domain
+                and batch_call.service == call.service
+                and batch_payload == payload
+            ):
+                entity_ids.append(entity_id)
+                break
+        else:
+            batches.append(([entity_id], call, payload))
+
+    return [
+        (
+            tuple(entity_ids),
+            call
+            if len(entity_ids) == 1
+            else ServiceCallPlan(
+                call.domain,
+                call.service,
+                ReadOnlyDict({**payload, ATTR_ENTITY_ID: entity_ids}),
+            ),
+        )
+        for entity_ids, call, payload in batches
+    ]
+
+
+def plan_shutdown(
+    entities: Iterable[str],
+    turn_off: dict[str, ServiceCallPlan],
+    order: tuple[str, ...],
+    delay: float,
+    call_timeout: float | None = None,
+) -> tuple[ShutdownStage, ...]:
+    """Split a set of devices into concurrent shutdown stages.
+
+    Devices without an ordering constraint are turned off concurrently in the
+    first stage, together with the first device of ``order``; every further
+    ordered device gets its own stage.  ``delay`` is waited between stages.
+    Devices missing from ``turn_off`` (left over from an interrupted run of
+    another activity) get their turn-off call resolved on the fly.
+    """
+    pending = set(entities)
+    ordered = [entity_id for entity_id in order if entity_id in pending]
+    first = sorted(pending - set(ordered[1:]))
+    stages = [first] + [[entity_id] for entity_id in ordered[1:]]
+
+    return tuple(
+        ShutdownStage(
+            calls=tuple(
+                batch_calls(
+                    (entity_id, turn_off.get(entity_id) or compile_turn_off(entity_id))
+                    for entity_id in stage
+                )
+            ),
+            delay_after=delay if pos < len(stages) - 1 else 0,
+            call_timeout=call_timeout,
+        )
+        for pos, stage in enumerate(stages)
+        if stage
+    )
+
+
+def _can_batch(prev: StepPlan, step: StepPlan) -> bool:
+    """Return True if step can be sent in the same service call as prev.
+
+    Only consecutive steps of a timeline qualify: same step type and call
+    payload, no delay or readiness wait on either step, and no dependency
+    that prev does not already wait for.  A step with a delay stays on its
+    own, so the delay is only waited (and learned) for its own entity.
+    """
+    return (
+        prev.call is not None
+        and step.call is not None
+        and prev.step_type == step.step_type
+        and step.step_type != STEP_TYPE_CALL_ACTION
+        and prev.delay_after == 0
+        and step.delay_after == 0
+        and prev.ready is None
+        and step.ready is None
+        and bool(step.entity_ids)
+        and not set(step.entity_ids) & set(prev.entity_ids)
+        and set(step.prerequisites) <= set(prev.prerequisites)
+        and prev.call.domain == step.call.domain
+        and prev.call.service == step.call.service
+        and prev.target_value == step.target_value
+        and prev.call_timeout == step.call_timeout
+        and prev.retries == step.retries
+        and _payload_without_entities(prev.call) == _payload_without_entities(step.call)
+    )
+
+
+def _merge(prev: StepPlan, step: StepPlan) -> StepPlan:
+    """Combine two batchable steps into one multi-entity step."""
+    entity_ids = prev.entity_ids + step.entity_ids
+    call = prev.call
+    assert call is not None
+    return StepPlan(
+        index=prev.index,
+        indices=prev.indices + step.indices,
+        step_type=prev.step_type,
+        entity_ids=entity_ids,
+        call=ServiceCallPlan(
+            call.domain,
+            call.service,
+            ReadOnlyDict(
+                {**_payload_without_entities(call), ATTR_ENTITY_ID: list(entity_ids)}
+            ),
+        ),
+        delay_after=step.delay_after,
+        timeline=prev.timeline,
+        prerequisites=prev.prerequisites,
+        ready=None,
+        target_attribute=prev.target_attribute,
+        target_value=prev.target_value,
+        call_timeout=prev.call_timeout,
+        retries=prev.retries,
+        verify=prev.verify,
+        adaptive=prev.adaptive,
+    )
+
+
+def _coalesce(timeline: list[StepPlan]) -> tuple[StepPlan, ...]:
+    """Batch consecutive identical calls of a timeline."""
+    merged: list[StepPlan] = []
+    for step in timeline:
+        if merged and _can_batch(merged[-1], step):
+            merged[-1] = _merge(merged[-1], step)
+        else:
+            merged.append(step)
+    return tuple(merged)
+
+
+# Dispatch table: step_type -> compiler (entity_id, parameters) -> service call
+_STEP_COMPILERS: dict[
+    str, Callable[[str, dict[str, Any]], ServiceCallPlan | None]
+] = {
+    STEP_TYPE_POWER_ON: lambda entity_id, _: compile_turn_on(entity_id),
+    STEP_TYPE_POWER_OFF: lambda entity_id, _: compile_turn_off(entity_id),
+    STEP_TYPE_SET_SOURCE: _compile_set_source,
+    STEP_TYPE_SET_VOLUME: _compile_set_volume,
+    STEP_TYPE_SET_SOUND_MODE: _compile_set_sound_mode,
+    STEP_TYPE_SET_BRIGHTNESS: _compile_set_brightness,
+    STEP_TYPE_SET_COLOR_TEMP: _compile_set_color_temp,
+    STEP_TYPE_SET_POSITION: _compile_set_position,
+    STEP_TYPE_SET_TILT: _compile_set_tilt,
+    STEP_TYPE_CALL_ACTION: _compile_call_action,
+    # STEP_TYPE_DELAY: no call — the delay is applied via delay_after only
+}
+
+
+def _call_timeout(config: dict[str, Any], default: float | None) -> float | None:
+    """Resolve the blocking call timeout of an activity or step.
+
+    Returns None for fire-and-forget calls.  A step without its own
+    ``blocking`` flag inherits the activity default, ``blocking: false``
+    opts a step out of it; a blocking step without ``call_timeout`` uses the
+    activity's timeout, then DEFAULT_CALL_TIMEOUT.
+    """
+    blocking = config.get(CONF_BLOCKING)
+    if blocking is None:
+        return default
+    if not blocking:
+        return None
+    return config.get(CONF_CALL_TIMEOUT) or default or DEFAULT_CALL_TIMEOUT
+
+
+def compile_activity(name: str, activity: dict[str, Any]) -> ActivityPlan:
+    """Compile the config dict of one activity into an ActivityPlan."""
+    per_entity = activity.get(CONF_EXECUTION_MODE, EXECUTION_MODE_SEQUENTIAL) == (
+        EXECUTION_MODE_PER_ENTITY
+    )
+    activity_timeout = _call_timeout(activity, None)
+    adaptive = bool(activity.get(CONF_ADAPTIVE_DELAYS))
+    enforce = bool(activity.get(CONF_ENFORCE))
+    steps: list[StepPlan] = []
+    timelines: dict[str, list[StepPlan]] = {}
+    last_on_timeline: dict[str, int] = {}
+    entities: dict[str, None] = {}  # insertion order == first occurrence
+    expected: dict[tuple[str, str | None], tuple[str, Any]] = {}  # last step wins
+    enforced: dict[str, dict[str, StepPlan]] = {}  # last step per attribute wins
+
+    for idx, step in enumerate(activity.get(CONF_STEPS, []), 1):
+        step_type = step.get(CONF_STEP_TYPE, "")
+        entity_id = step.get(CONF_ENTITY_ID, "").strip()
+        parameters = step.get(CONF_STEP_PARAMETERS) or {}
+        delay_after = step.get(CONF_STEP_DELAY_AFTER, 0)
+
+        compiler = _STEP_COMPILERS.get(step_type)
+        if compiler is None and step_type != STEP_TYPE_DELAY:
+            _LOGGER.warning("Unknown step type: %s", step_type)
+        call = compiler(entity_id, parameters) if compiler else None
+
+        timeline = step.get(CONF_STEP_GROUP) or ""
+        if not timeline and per_entity:
+            timeline = entity_id
+
+        # Dependencies only point backwards, so the graph is always acyclic
+        prerequisites = []
+        for dep in step.get(CONF_STEP_DEPENDS_ON) or []:
+            if dep == timeline:
+                continue
+            if dep in last_on_timeline:
+                prerequisites.append(last_on_timeline[dep])
+            else:
+                _LOGGER.warning(
+                    "Step %d of '%s' depends on group '%s' which has no earlier steps",
+                    idx,
+                    name,
+                    dep,
+                )
+
+        wait_state = step.get(CONF_STEP_WAIT_STATE)
+        wait_attribute = step.get(CONF_STEP_WAIT_ATTRIBUTE)
+        ready = (
+            readiness_predicate(wait_state, wait_attribute)
+            if entity_id and (wait_state or wait_attribute)
+            else None
+        )
+
+        target_attribute = None
+        target_value = None
+        if step_type in _ATTRIBUTE_STEPS:
+            param, target_attribute = _ATTRIBUTE_STEPS[step_type]
+            target_value = parameters.get(param)
+
+        plan = StepPlan(
+            index=idx,
+            indices=(idx,),
+            step_type=step_type,
+            entity_ids=(entity_id,) if entity_id else (),
+            call=call,
+            delay_after=delay_after,
+            timeline=timeline,
+            prerequisites=tuple(prerequisites),
+            ready=ready,
+            target_attribute=target_attribute,
+            target_value=target_value,
+            call_timeout=_call_timeout(step, activity_timeout),
+            retries=step.get(CONF_STEP_RETRIES, 0),
+            verify=verification_predicate(step_type, target_attribute, target_value),
+            adaptive=adaptive and step_type == STEP_TYPE_POWER_ON,
+        )
+        steps.append(plan)
+        timelines.setdefault(timeline, []).append(plan)
+        last_on_timeline[timeline] = idx
+
+        if entity_id:
+            entities[entity_id] = None
+            if step_type in (STEP_TYPE_POWER_ON, STEP_TYPE_POWER_OFF):
+                expected[(entity_id, None)] = (
+                    step_type,
+                    step_type == STEP_TYPE_POWER_ON,
+                )
+            elif step_type in _EXPECTED_ATTRIBUTE_STEPS and target_value is not None:
+                expected[(entity_id, target_attribute)] = (step_type, target_value)
+            if (
+                enforce
+                and step_type in _ENFORCED_STEPS
+                and call is not None
+                and target_value is not None
+            ):
+                enforced.setdefault(entity_id, {})[target_attribute] = plan
+
+    batched = tuple(_coalesce(timeline) for timeline in timelines.values())
+    turn_off = ReadOnlyDict(
+        {entity_id: compile_turn_off(entity_id) for entity_id in entities}
+    )
+    shutdown_order = tuple(activity.get(CONF_SHUTDOWN_ORDER) or ())
+    shutdown_delay = activity.get(CONF_SHUTDOWN_DELAY, 0)
+
+    return ActivityPlan(
+        name=name,
+        steps=tuple(sorted((s for t in batched for s in t), key=lambda s: s.index)),
+        step_count=len(steps),
+        timelines=batched,
+        entities=frozenset(entities),
+        shutdown=plan_shutdown(
+            entities, turn_off, shutdown_order, shutdown_delay, activity_timeout
+        ),
+        turn_off=turn_off,
+        shutdown_order=shutdown_order,
+        shutdown_delay=shutdown_delay,
+        call_timeout=activity_timeout,
+        expectations=tuple(
+            (entity_id, step_type, attribute, value)
+            for (entity_id, attribute), (step_type, value) in expected.items()
+        ),
+        enforced=ReadOnlyDict(
+            {
+                entity_id: tuple(sorted(by_attribute.values(), key=lambda s: s.index))
+                for entity_id, by_attribute in enforced.items()
+            }
+        ),
+    )
+
+
+def _attribute_targets(plan: ActivityPlan) -> dict[tuple[str, str], Any]:
+    """Return the value each (entity, attribute) has after an activity ran."""
+    targets: dict[tuple[str, str], Any] = {}
+    for step in plan.steps:  # sorted by index, so the last step wins
+        if step.target_attribute is None or step.target_value is None:
+            continue
+        for entity_id in step.entity_ids:
+            targets[(entity_id, step.target_attribute)] = step.target_value
+    return targets
+
+
+def compile_transition(source: ActivityPlan, target: ActivityPlan) -> TransitionPlan:
+    """Precompute switching from one activity to another."""
+    turn_off = source.entities - target.entities
+    previous = _attribute_targets(source)
+    reapply = frozenset(
+        step.index
+        for step in target.steps
+        if step.call is not None
+        and step.target_attribute is not None
+        and step.target_value is not None
+        and any(
+            previous.get((entity_id, step.target_attribute)) != step.target_value
+            for entity_id in step.entity_ids
+        )
+    )
+    return TransitionPlan(
+        source=source.name,
+        target=target.name,
+        turn_off=turn_off,
+        shutdown=source.shutdown_stages(turn_off),
+        kept_on=source.entities & target.entities,
+        reapply=reapply,
+    )
+
+
+def compile_room(room_id: str, room: dict[str, Any]) -> RoomPlan:
+    """Compile all activities of a room and the transitions between them."""
+    activities = {
+        name: compile_activity(name, activity)
+        for name, activity in room.get(CONF_ACTIVITIES, {}).items()
+    }
+    return RoomPlan(
+        room_id=room_id,
+        activities=ReadOnlyDict(activities),
+        entities=frozenset().union(*(plan.entities for plan in activities.values())),
+        transitions=ReadOnlyDict(
+            {
+                (source.name, target.name): compile_transition(source, target)
+                for source in activities.values()
+                for target in activities.values()
+                if source is not target
+            }
+        ),
+    )
+
+
+def compile_rooms(rooms: dict[str, dict[str, Any]]) -> dict[str, RoomPlan]:
+    """Compile all rooms."""
+    return {room_id: compile_room(room_id, room) for room_id, room in rooms.items()}
+
+
+def index_entities(
+    plans: dict[str, RoomPlan],
+) -> ReadOnlyDict[str, tuple[tuple[str, str, int], ...]]:
+    """Map every referenced entity to the (room, activity, step) using it."""
+    index: dict[str, list[tuple[str, str, int]]] = {}
+    for room_id, room_plan in plans.items():
+        for name, plan in room_plan.activities.items():
+            for step in plan.steps:
+                for entity_id in step.entity_ids:
+                    index.setdefault(entity_id, []).append(
+                        (room_id, name, step.index)
+                    )
+    return ReadOnlyDict({entity_id: tuple(refs) for entity_id, refs in index.items()})
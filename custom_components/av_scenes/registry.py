@@ -0,0 +1,90 @@
+"""Domain-wide room index for AV Scenes."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_ROOM_REGISTRY, DOMAIN
+from .coordinator import AVScenesCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RoomRegistry:
+    """Map room ids and room names to the coordinator managing the room.
+
+    Rooms are registered when a config entry is set up and removed again on
+    unload, so service calls resolve their room with a dict lookup.  A room id
+    that is already owned by another entry is rejected and reported instead
+    of being shadowed silently.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._rooms: dict[str, AVScenesCoordinator] = {}
+        # casefolded room name -> room_id
+        self._names: dict[str, str] = {}
+
+    @callback
+    def async_register(self, coordinator: AVScenesCoordinator) -> None:
+        """Index all rooms of a coordinator."""
+        for room_id, room in coordinator.rooms.items():
+            owner = self._rooms.get(room_id)
+            if owner is not None and owner is not coordinator:
+                _LOGGER.error(
+                    "Room id '%s' of '%s' is already used by '%s'; "
+                    "services will keep addressing the existing room",
+                    room_id,
+                    coordinator.entry.title,
+                    owner.entry.title,
+                )
+                continue
+            self._rooms[room_id] = coordinator
+
+            name = str(room.get("name", room_id)).casefold()
+            if self._names.setdefault(name, room_id) != room_id:
+                _LOGGER.warning(
+                    "Room name '%s' is used more than once; "
+                    "address room '%s' by its id",
+                    room.get("name"),
+                    room_id,
+                )
+
+    @callback
+    def async_unregister(self, coordinator: AVScenesCoordinator) -> None:
+        """Drop all rooms of a coordinator."""
+        room_ids = {
+            room_id
+            for room_id, owner in self._rooms.items()
+            if owner is coordinator
+        }
+        for room_id in room_ids:
+            del self._rooms[room_id]
+        self._names = {
+            name: room_id
+            for name, room_id in self._names.items()
+            if room_id not in room_ids
+        }
+
+    @callback
+    def async_resolve(self, room: str) -> tuple[AVScenesCoordinator, str] | None:
+        """Return (coordinator, room_id) for a room id or room name."""
+        room_id = room if room in self._rooms else self._names.get(room.casefold())
+        if room_id is None:
+            return None
+        return self._rooms[room_id], room_id
+
+    @property
+    def room_ids(self) -> list[str]:
+        """Return all registered room ids."""
+        return list(self._rooms)
+
+
+@callback
+def async_get_registry(hass: HomeAssistant) -> RoomRegistry:
+    """Return the room registry of the domain, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_ROOM_REGISTRY not in domain_data:
+        domain_data[DATA_ROOM_REGISTRY] = RoomRegistry()
+    return domain_data[DATA_ROOM_REGISTRY]
@@ -0,0 +1,116 @@
+"""Timing reports of activity runs, returned as service response data."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import time
+from typing import Any
+
+# Run status
+RUN_STATUS_RUNNING = "running"
+RUN_STATUS_COMPLETED = "completed"
+RUN_STATUS_SUPERSEDED = "superseded"  # dropped or cancelled by a newer request
+RUN_STATUS_FAILED = "failed"  # room/activity not found, nothing was run
+
+# Step status
+STEP_STATUS_OK = "ok"
+STEP_STATUS_FAILED = "failed"
+STEP_STATUS_SKIPPED = "skipped"  # already at target
+STEP_STATUS_NOT_READY = "not_ready"  # readiness wait timed out
+STEP_STATUS_TIMEOUT = "timeout"  # blocking service call timed out
+STEP_STATUS_UNVERIFIED = "unverified"  # device never confirmed the target
+_FAILED_STATUSES = (
+    STEP_STATUS_FAILED,
+    STEP_STATUS_NOT_READY,
+    STEP_STATUS_TIMEOUT,
+    STEP_STATUS_UNVERIFIED,
+)
+
+
+@dataclass(slots=True)
+class StepReport:
+    """Outcome of one executed step (or one shutdown stage).
+
+    ``latency`` is the time spent in the service call (including verification
+    and backoff when the step was retried), ``wait`` the time spent in
+    ``delay_after`` or the readiness wait afterwards (seconds).  A batched
+    step covers several configured steps (``indices``, one entity each) and
+    is reported once per configured step.
+    """
+
+    index: int
+    step_type: str
+    entity_ids: tuple[str, ...]
+    status: str = STEP_STATUS_OK
+    latency: float = 0.0
+    wait: float = 0.0
+    attempts: int = 1
+    indices: tuple[int, ...] = ()
+
+    def as_dicts(self) -> list[dict[str, Any]]:
+        """Return one entry per configured step covered by this report."""
+        data = self.as_dict()
+        if len(self.indices) <= 1:
+            return [data]
+        per_entity = len(self.entity_ids) == len(self.indices)
+        return [
+            {
+                **data,
+                "index": index,
+                "entity_ids": [self.entity_ids[pos]] if per_entity else data["entity_ids"],
+            }
+            for pos, index in enumerate(self.indices)
+        ]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report as service response data."""
+        return {
+            "index": self.index,
+            "step_type": self.step_type,
+            "entity_ids": list(self.entity_ids),
+            "status": self.status,
+            "latency": round(self.latency, 3),
+            "wait": round(self.wait, 3),
+            "attempts": self.attempts,
+        }
+
+
+@dataclass(slots=True)
+class RunReport:
+    """Outcome of one start or stop of a room."""
+
+    room_id: str
+    action: str  # "start" | "stop"
+    activity: str | None = None
+    status: str = RUN_STATUS_RUNNING
+    error: str | None = None
+    steps: list[StepReport] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+    duration: float = 0.0
+
+    def finish(self, status: str, error: str | None = None) -> None:
+        """Record the final status and the total wall time."""
+        self.status = status
+        self.error = error
+        self.duration = time.monotonic() - self.started
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report as service response data."""
+        steps = sorted(
+            (entry for step in self.steps for entry in step.as_dicts()),
+            key=lambda entry: entry["index"],
+        )
+        return {
+            "room": self.room_id,
+            "action": self.action,
+            "activity": self.activity,
+            "status": self.status,
+            "error": self.error,
+            "duration": round(self.duration, 3),
+            "steps": steps,
+            "skipped": [
+                step["index"] for step in steps if step["status"] == STEP_STATUS_SKIPPED
+            ],
+            "failed": [
+                step["index"] for step in steps if step["status"] in _FAILED_STATUSES
+            ],
+        }
@@ -14,7 +14,6 @@ from homeassistant.components.select import SelectEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
@@ -25,6 +24,7 @@ from .const import (
     ACTIVITY_STATE_STOPPING,
 )
 from .coordinator import AVScenesCoordinator
+from .entity import AVScenesRoomEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -53,7 +53,7 @@ async def async_setup_entry(
     _LOGGER.debug("Created %d room activity selects", len(entities))
 
 
-class RoomActivitySelect(CoordinatorEntity, SelectEntity):
+class RoomActivitySelect(AVScenesRoomEntity, SelectEntity):
     """Select entity that shows the current activity and allows switching."""
 
     _attr_has_entity_name = True
@@ -61,8 +61,7 @@ class RoomActivitySelect(CoordinatorEntity, SelectEntity):
 
     def __init__(self, coordinator: AVScenesCoordinator, room_id: str) -> None:
         """Initialize the select entity."""
-        super().__init__(coordinator)
-        self.room_id = room_id
+        super().__init__(coordinator, room_id)
 
         room_data = coordinator.rooms[room_id]
         self._room_name: str = room_data.get("name", room_id)
@@ -8,7 +8,6 @@ from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
@@ -24,6 +23,7 @@ from .const import (
     DEVICE_NAME_PREFIX,
 )
 from .coordinator import AVScenesCoordinator
+from .entity import AVScenesRoomEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -52,7 +52,7 @@ async def async_setup_entry(
     _LOGGER.debug("Created %d room activity sensors", len(sensors))
 
 
-class RoomActivitySensor(CoordinatorEntity, SensorEntity):
+class RoomActivitySensor(AVScenesRoomEntity, SensorEntity):
     """Sensor that exposes the current activity state of a room.
 
     State values: idle | starting | active | stopping
@@ -71,8 +71,7 @@ class RoomActivitySensor(CoordinatorEntity, SensorEntity):
 
     def __init__(self, coordinator: AVScenesCoordinator, room_id: str) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self.room_id = room_id
+        super().__init__(coordinator, room_id)
 
         room_name = coordinator.rooms[room_id].get("name", room_id)
         self._room_name = room_name
@@ -8,7 +8,6 @@ from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
@@ -18,6 +17,7 @@ from .const import (
     DEVICE_NAME_PREFIX,
 )
 from .coordinator import AVScenesCoordinator
+from .entity import AVScenesRoomEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,7 +40,7 @@ async def async_setup_entry(
     _LOGGER.info(f"Created {len(switches)} room activity switches")
 
 
-class RoomActivitySwitch(CoordinatorEntity, SwitchEntity):
+class RoomActivitySwitch(AVScenesRoomEntity, SwitchEntity):
     """Representation of a room activity status."""
 
     def __init__(
@@ -49,8 +49,7 @@ class RoomActivitySwitch(CoordinatorEntity, SwitchEntity):
         room_id: str,
     ) -> None:
         """Initialize the switch."""
-        super().__init__(coordinator)
-        self.room_id = room_id
+        super().__init__(coordinator, room_id)
         
         room_name = coordinator.rooms[room_id].get("name", room_id)
         self._attr_name = f"{room_name} Activity"